@@ -1,17 +1,19 @@
 # bot.py
 import asyncio
+import hashlib
 import html
 import logging
 import os
 import random
 import re
 import socket
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import pytz
 from config import BOT_TOKEN, TZ_NAME, POLL_MIN_SEC as MIN_SEC, POLL_MAX_SEC as MAX_SEC
 from aiogram import Bot, Dispatcher, F
 from aiogram.client.default import DefaultBotProperties
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
 from aiogram.types import BufferedInputFile, KeyboardButton, Message, ReplyKeyboardMarkup
 
@@ -19,11 +21,10 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 
 from parser_altseason import (
-    fetch_altseason_index,
-    render_altseason_card,
+    fetch_altseason_snapshot_async as fetch_altseason_snapshot,
+    render_altseason_card_async as render_altseason_card,
     format_altseason_text,
     format_altseason_status,
-    fetch_altseason_stats,
     format_altseason_stats,
 )
 DEFAULT_IND = "JOBLESS_CLAIMS"
@@ -43,13 +44,18 @@ log = logging.getLogger("jobless-extended")
 from storage import (
     init_db, add_sub, list_subs, set_state, get_state,
     add_custom_indicator, delete_custom_indicator_by_title,
-    list_custom_indicators,
+    list_custom_indicators, load_table_layouts,
 )
 from indicators import get_indicators, PRESET_INDICATORS, rules_hints
+from cache import TTLCache
+from http_client import close_async_session
+from cpu_pool import shutdown_cpu_pool, warm_cpu_pool
 from parser_investing_generic import (
-    fetch_table_rows as fetch_rows_generic,
+    fetch_table_rows_async as fetch_rows_generic,
+    fetch_latest_row_async as fetch_latest_generic,
     format_table_for_tg as format_tg_generic,
-    render_table_png as render_png_generic,
+    render_table_png_async as render_png_generic,
+    set_table_layouts,
 )
 
 bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode="HTML"))
@@ -331,114 +337,157 @@ def _signal_from_rows(rows, ind_key: str, ind_map: Dict[str, dict]) -> str:
     # Обычный случай: есть и факт, и прогноз
     return f"{title}\nФакт: {a_str} • Прогноз: {f_str} → {sig}"
 
+def _stale_note(rows) -> str:
+    """Пометка, если строки отданы из кэша, пока сайт недоступен (circuit breaker)."""
+    if rows and rows[0].get("stale"):
+        return "\n⚠️ <i>Источник недоступен — показаны последние сохранённые данные.</i>"
+    return ""
+
+def _altseason_stats_text(snap: dict) -> str:
+    if snap.get("stats"):
+        return format_altseason_stats(snap["stats"])
+    return f"ℹ️ Табличную сводку получить не удалось: {h(snap.get('stats_error'))}"
+
 # ==== sending ====
 async def _send_table_text(m: Message, ind_key: str):
     if ind_key == ALTSEASON_KEY:
         try:
-            idx, used_url = fetch_altseason_index()
-            await m.answer(format_altseason_text(int(idx), used_url), disable_web_page_preview=True)
-            try:
-                stats = fetch_altseason_stats()
-                await m.answer(format_altseason_stats(stats), disable_web_page_preview=True)
-            except Exception as e:
-                await m.answer(f"ℹ️ Табличную сводку получить не удалось: {h(e)}")
+            snap = await fetch_altseason_snapshot()
         except Exception as e:
             await m.answer(f"⚠️ Не удалось получить индекс альтсезона: {h(e)}")
+            return
+        await m.answer(format_altseason_text(int(snap["index"]), snap["url"]), disable_web_page_preview=True)
+        await m.answer(_altseason_stats_text(snap), disable_web_page_preview=True)
         return
 
     IND = await get_indicators(m.chat.id)
     meta = IND[ind_key]
-    rows, err = fetch_rows_generic(meta["url"])
+    rows, err = await fetch_rows_generic(meta["url"])
     if err:
         await m.answer(f"⚠️ Не удалось получить таблицу: {h(err)}")
         return
-    msg = format_tg_generic(rows, src_url=meta["url"], max_rows=8)
+    msg = format_tg_generic(rows, src_url=meta["url"], max_rows=8) + _stale_note(rows)
     await m.answer(msg, disable_web_page_preview=True)
 
+# ==== PNG: повторная отправка по file_id ====
+# sha1(png) -> file_id первой загрузки: та же картинка в другие чаты уходит без повторного аплоада
+FILE_ID_TTL = 24 * 3600
+_FILE_IDS = TTLCache(maxsize=512)
+_UPLOAD_LOCKS: Dict[str, asyncio.Lock] = {}
+
+def _reply_target(m: Message) -> Dict[str, Any]:
+    """Тема форума и business-подключение входящего сообщения — как их подставляет m.answer_*."""
+    return {
+        "message_thread_id": m.message_thread_id if m.is_topic_message else None,
+        "business_connection_id": m.business_connection_id,
+    }
+
+async def _send_png(chat_id: int, png: bytes, fname: str, caption: Optional[str] = None,
+                    message_thread_id: Optional[int] = None,
+                    business_connection_id: Optional[str] = None):
+    target = {"message_thread_id": message_thread_id, "business_connection_id": business_connection_id}
+    digest = hashlib.sha1(png).hexdigest()
+    file_id = _FILE_IDS.get(digest)
+    if file_id is None:
+        # первая отправка грузит файл, конкурентные ждут её file_id
+        lock = _UPLOAD_LOCKS.setdefault(digest, asyncio.Lock())
+        async with lock:
+            file_id = _FILE_IDS.get(digest)
+            if file_id is None:
+                try:
+                    msg = await bot.send_document(chat_id, BufferedInputFile(png, filename=fname),
+                                                   caption=caption, **target)
+                    if msg.document:
+                        _FILE_IDS.set(digest, msg.document.file_id, FILE_ID_TTL)
+                finally:
+                    _UPLOAD_LOCKS.pop(digest, None)
+                return msg
+    try:
+        return await bot.send_document(chat_id, file_id, caption=caption, **target)
+    except TelegramBadRequest as e:
+        log.info("file_id reuse failed, uploading again: %s", e)
+        _FILE_IDS.invalidate(digest)
+        return await bot.send_document(chat_id, BufferedInputFile(png, filename=fname),
+                                       caption=caption, **target)
+
 async def _send_table_png(m: Message, ind_key: str):
     if ind_key == ALTSEASON_KEY:
         try:
-            idx, _ = fetch_altseason_index()
-            png, fname = render_altseason_card(int(idx))
-            await m.answer_document(BufferedInputFile(png, filename=fname), caption=ALTSEASON_TITLE)
+            snap = await fetch_altseason_snapshot()
+            png, fname = await render_altseason_card(int(snap["index"]))
+            await _send_png(m.chat.id, png, fname, caption=ALTSEASON_TITLE, **_reply_target(m))
         except Exception as e:
             await m.answer(f"⚠️ Не удалось получить индекс альтсезона: {h(e)}")
         return
 
     IND = await get_indicators(m.chat.id)
     meta = IND[ind_key]
-    rows, err = fetch_rows_generic(meta["url"])
+    rows, err = await fetch_rows_generic(meta["url"])
     if err:
         await m.answer(f"⚠️ Не удалось получить таблицу: {h(err)}")
         return
-    png_bytes, fname = render_png_generic(rows, title=meta["title"], max_rows=8)
-    file = BufferedInputFile(png_bytes, filename=fname)
-    await m.answer_document(file, caption=h(meta["title"]))
+    png_bytes, fname = await render_png_generic(rows, title=meta["title"], max_rows=8)
+    await _send_png(m.chat.id, png_bytes, fname, caption=h(meta["title"]) + _stale_note(rows),
+                    **_reply_target(m))
 
 @dp.message(F.text == BTN_CHECK)
 async def cmd_check(m: Message):
     ind_key = await _get_selected_key(m.chat.id)
     if ind_key == ALTSEASON_KEY:
         try:
-            idx, used_url = fetch_altseason_index()
-            png, fname = render_altseason_card(int(idx))
-            await m.answer_document(BufferedInputFile(png, filename=fname), caption=ALTSEASON_TITLE)
+            snap = await fetch_altseason_snapshot()
+            idx = int(snap["index"])
+            png, fname = await render_altseason_card(idx)
+            await _send_png(m.chat.id, png, fname, caption=ALTSEASON_TITLE, **_reply_target(m))
             await m.answer(
-                format_altseason_status(int(idx)) + f"\n\n<i>Источник</i>: {used_url}",
+                format_altseason_status(idx) + f"\n\n<i>Источник</i>: {snap['url']}",
                 disable_web_page_preview=True
             )
-            try:
-                stats = fetch_altseason_stats()
-                await m.answer(format_altseason_stats(stats), disable_web_page_preview=True)
-            except Exception as e:
-                await m.answer(f"ℹ️ Табличную сводку получить не удалось: {h(e)}")
+            await m.answer(_altseason_stats_text(snap), disable_web_page_preview=True)
         except Exception as e:
             await m.answer(f"⚠️ Не удалось получить индекс альтсезона: {h(e)}")
         return
 
     IND = await get_indicators(m.chat.id)
     meta = IND[ind_key]
-    rows, err = fetch_rows_generic(meta["url"])
+    rows, err = await fetch_rows_generic(meta["url"])
     if err:
         await m.answer(f"⚠️ Не удалось получить данные: {h(err)}")
         return
-    png_bytes, fname = render_png_generic(rows, title=meta["title"], max_rows=8)
-    await m.answer_document(BufferedInputFile(png_bytes, filename=fname))
-    await m.answer(_signal_from_rows(rows, ind_key, IND), disable_web_page_preview=True)
+    png_bytes, fname = await render_png_generic(rows, title=meta["title"], max_rows=8)
+    await _send_png(m.chat.id, png_bytes, fname, **_reply_target(m))
+    await m.answer(_signal_from_rows(rows, ind_key, IND) + _stale_note(rows), disable_web_page_preview=True)
 
 async def send_indicator_update_for_chat(chat_id: int, ind_key: str):
     if ind_key == ALTSEASON_KEY:
         try:
-            idx, used_url = fetch_altseason_index()
-            png, fname = render_altseason_card(int(idx))
-            await bot.send_document(chat_id, BufferedInputFile(png, filename=fname), caption=ALTSEASON_TITLE)
+            snap = await fetch_altseason_snapshot()
+            idx = int(snap["index"])
+            png, fname = await render_altseason_card(idx)
+            await _send_png(chat_id, png, fname, caption=ALTSEASON_TITLE)
             await bot.send_message(
                 chat_id,
-                format_altseason_status(int(idx)) + f"\n\n<i>Источник</i>: {used_url}",
+                format_altseason_status(idx) + f"\n\n<i>Источник</i>: {snap['url']}",
                 disable_web_page_preview=True
             )
-            try:
-                stats = fetch_altseason_stats()
-                await bot.send_message(chat_id, format_altseason_stats(stats), disable_web_page_preview=True)
-            except Exception as e:
-                await bot.send_message(chat_id, f"ℹ️ Табличную сводку получить не удалось: {h(e)}")
+            await bot.send_message(chat_id, _altseason_stats_text(snap), disable_web_page_preview=True)
         except Exception as e:
             await bot.send_message(chat_id, f"⚠️ Не удалось получить индекс альтсезона: {h(e)}")
         return
 
     IND = await get_indicators(chat_id)
     meta = IND[ind_key]
-    rows, err = fetch_rows_generic(meta["url"])
+    rows, err = await fetch_rows_generic(meta["url"])
     if err:
         await bot.send_message(chat_id, f"⚠️ {h(meta['title'])}: не удалось получить данные: {h(err)}")
         return
     try:
-        png_bytes, fname = render_png_generic(rows, title=meta["title"], max_rows=8)
-        file = BufferedInputFile(png_bytes, filename=fname)
-        await bot.send_document(chat_id, file, caption=h(meta["title"]))
+        png_bytes, fname = await render_png_generic(rows, title=meta["title"], max_rows=8)
+        await _send_png(chat_id, png_bytes, fname, caption=h(meta["title"]))
     except Exception as e:
         log.warning("send PNG fail %s: %s", ind_key, e)
-    await bot.send_message(chat_id, _signal_from_rows(rows, ind_key, IND), disable_web_page_preview=True)
+    await bot.send_message(chat_id, _signal_from_rows(rows, ind_key, IND) + _stale_note(rows),
+                           disable_web_page_preview=True)
 
 # ==== scheduler ====
 scheduler: Optional[AsyncIOScheduler] = None
@@ -692,23 +741,19 @@ async def open_altseason_menu(m: Message):
 @dp.message(F.text == BTN_ALTSEASON_CHECK)
 async def altseason_check(m: Message):
     try:
-        idx, used_url = fetch_altseason_index()
+        snap = await fetch_altseason_snapshot()
     except Exception as e:
         await m.answer(f"⚠️ Не удалось получить индекс альтсезона: {h(e)}")
         return
 
-    png, fname = render_altseason_card(int(idx))
-    await m.answer_document(BufferedInputFile(png, filename=fname))
+    idx = int(snap["index"])
+    png, fname = await render_altseason_card(idx)
+    await _send_png(m.chat.id, png, fname, **_reply_target(m))
     await m.answer(
-        format_altseason_status(int(idx)) + f"\n\n<i>Источник</i>: {used_url}",
+        format_altseason_status(idx) + f"\n\n<i>Источник</i>: {snap['url']}",
         disable_web_page_preview=True
     )
-
-    try:
-        stats = fetch_altseason_stats()
-        await m.answer(format_altseason_stats(stats), disable_web_page_preview=True)
-    except Exception as e:
-        await m.answer(f"ℹ️ Табличную сводку получить не удалось: {h(e)}")
+    await m.answer(_altseason_stats_text(snap), disable_web_page_preview=True)
 
 # ==== кастомы ====
 @dp.message(F.text == BTN_IND_ADD)
@@ -896,18 +941,20 @@ async def poll_loop():
         try:
             IND = await get_indicators(0)
             meta = IND["JOBLESS_CLAIMS"]
-            rows, err = fetch_rows_generic(meta["url"])
+            # мимо кэша: ловим выход факта сразу, свежие строки заодно обновят кэш
+            top, err = await fetch_latest_generic(meta["url"], use_cache=False)
             if err:
                 log.warning("poll error: %s", err)
+            elif top and top.get("stale"):
+                log.info("poll: source unavailable, skipping stale rows")
             else:
-                top = rows[0] if rows else None
                 if top:
                     a = top.get("actual_val"); f = top.get("forecast_val")
                     state_now = ("num" if a is not None else "wait", a, f, top.get("date",""))
                     if last_state != state_now:
                         if last_state and last_state[0] == "wait" and state_now[0] == "num":
                             subs = await list_subs()
-                            text = _signal_from_rows(rows, "JOBLESS_CLAIMS", IND)
+                            text = _signal_from_rows([top], "JOBLESS_CLAIMS", IND)
                             for chat_id in subs:
                                 try:
                                     await bot.send_message(chat_id, text, disable_web_page_preview=True)
@@ -922,13 +969,14 @@ async def daily_1530_job():
     keys = ["JOBLESS_CLAIMS", "CPI", "NFP"]
     lines = ["⏰ 15:30 МСК. Обновления:"]
     IND = dict(PRESET_INDICATORS)
-    for k in keys:
+    # все страницы тянем параллельно, порядок строк сохраняем
+    results = await asyncio.gather(*(fetch_rows_generic(IND[k]["url"]) for k in keys))
+    for k, (rows, err) in zip(keys, results):
         meta = IND[k]
-        rows, err = fetch_rows_generic(meta["url"])
         if err:
             lines.append(f"{meta['title']}: ошибка получения")
         else:
-            lines.append(_signal_from_rows(rows, k, IND))
+            lines.append(_signal_from_rows(rows, k, IND) + _stale_note(rows))
     text = "\n".join(lines)
     subs = await list_subs()
     for chat_id in subs:
@@ -940,6 +988,7 @@ async def daily_1530_job():
 async def on_start():
     global scheduler
     await init_db()
+    set_table_layouts(await load_table_layouts())
     scheduler = AsyncIOScheduler(timezone=tz)
     scheduler.add_job(daily_1530_job, CronTrigger(hour=15, minute=30, timezone=tz))
 
@@ -958,6 +1007,7 @@ async def on_start():
                 await reschedule_user_job(chat_id, ind)
 
     scheduler.start()
+    asyncio.create_task(warm_cpu_pool())
     asyncio.create_task(poll_loop())
 
 def _single_instance_lock(port: int = 54678):
@@ -983,6 +1033,11 @@ async def main():
             await bot.session.close()
         except Exception:
             pass
+        try:
+            await close_async_session()
+        except Exception:
+            pass
+        shutdown_cpu_pool()
 
 if __name__ == "__main__":
     _lock = _single_instance_lock(54678)
@@ -0,0 +1,106 @@
+# cache.py
+# -*- coding: utf-8 -*-
+"""
+Простые in-process кэши для парсеров и бота.
+
+TTLCache — ключ -> значение с индивидуальным TTL на запись, LRU-вытеснение
+по количеству записей, счётчики попаданий/промахов.
+SizedLRUCache — без TTL, LRU-вытеснение по количеству записей и суммарному размеру
+в байтах (для готовых картинок и т.п.).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+class TTLCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = max(1, maxsize)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.monotonic():
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Значение без учёта TTL и без счётчиков (протухшее ещё не вытеснено)."""
+        with self._lock:
+            item = self._data.get(key)
+            return default if item is None else item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Сбросить одну запись (или весь кэш, если key=None)."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "hits": self.hits, "misses": self.misses}
+
+class SizedLRUCache:
+    def __init__(self, maxsize: int = 256, max_bytes: int = 16 * 1024 * 1024):
+        self.maxsize = max(1, maxsize)
+        self.max_bytes = max(0, max_bytes)
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any, size: int):
+        """size — вклад записи в лимит max_bytes; запись больше лимита не кладётся."""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[0]
+            self._data[key] = (size, value)
+            self._bytes += size
+            while len(self._data) > self.maxsize or self._bytes > self.max_bytes:
+                _, (old_size, _) = self._data.popitem(last=False)
+                self._bytes -= old_size
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        with self._lock:
+            if key is None:
+                self._data.clear()
+                self._bytes = 0
+            else:
+                old = self._data.pop(key, None)
+                if old is not None:
+                    self._bytes -= old[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._data), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
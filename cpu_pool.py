@@ -0,0 +1,93 @@
+# cpu_pool.py
+# -*- coding: utf-8 -*-
+"""
+Пул процессов для CPU-тяжёлой работы: разбор HTML (BeautifulSoup) и отрисовка PNG (Pillow).
+
+- ограничен CPU_WORKERS процессами (0 — пул выключен, всё считается в потоке)
+- воркеры прогреты: при старте импортируют bs4/PIL, парсеры и один раз рисуют
+  картинки, чтобы шрифты были загружены до первого реального запроса
+- если пул сломался (воркер упал) — задача выполняется в потоке, пул пересоздаётся
+
+Публичные функции:
+    await run_cpu(fn, *args)  # fn и аргументы должны пиклиться (функции уровня модуля)
+    await warm_cpu_pool()     # поднять все воркеры заранее (в on_start)
+    shutdown_cpu_pool()
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _init_worker():
+    """Прогрев воркера: импорты и первая отрисовка (загрузка шрифтов)."""
+    try:
+        import bs4  # noqa: F401
+        from PIL import Image  # noqa: F401
+        import parser_investing_generic
+        import parser_altseason
+        parser_investing_generic.render_table_png([], "warmup", max_rows=1)
+        parser_altseason.render_altseason_card(50)
+    except Exception:
+        pass
+
+def _noop() -> int:
+    return os.getpid()
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if CPU_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: воркеры не наследуют потоки/сокеты event loop родителя
+            _pool = ProcessPoolExecutor(
+                max_workers=CPU_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _pool
+
+def _reset_pool(broken: ProcessPoolExecutor):
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+async def run_cpu(fn: Callable[..., Any], *args) -> Any:
+    """Выполнить fn(*args) в пуле процессов, не блокируя event loop."""
+    pool = _get_pool()
+    if pool is None:
+        return await asyncio.to_thread(fn, *args)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        return await asyncio.to_thread(fn, *args)
+
+async def warm_cpu_pool():
+    """Запустить все воркеры сразу, а не на первом всплеске запросов."""
+    pool = _get_pool()
+    if pool is None:
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.gather(*(loop.run_in_executor(pool, _noop) for _ in range(CPU_WORKERS)))
+    except BrokenProcessPool:
+        _reset_pool(pool)
+
+def shutdown_cpu_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
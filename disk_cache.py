@@ -0,0 +1,154 @@
+# disk_cache.py
+# -*- coding: utf-8 -*-
+"""
+Дисковый кэш загруженных страниц (SQLite рядом с DB_PATH):
+
+- сырой HTML (zlib) + разобранный результат (JSON) на ключ (обычно url)
+- TTL на запись; протухшие записи не удаляются сразу — годятся для ревалидации (ETag)
+  и как «последние известные данные», пока сайт недоступен
+- LRU-вытеснение по суммарному размеру (HTTP_CACHE_MAX_MB)
+- get_html(key) — достать страницу как была, для отладки парсеров
+
+Отключается переменной окружения HTTP_DISK_CACHE=0.
+Синхронный API (sqlite3 из stdlib); из event loop звать через asyncio.to_thread.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional
+
+from storage import DB_PATH
+
+ENABLED = os.getenv("HTTP_DISK_CACHE", "1") != "0"
+CACHE_PATH = os.getenv(
+    "HTTP_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), "http_cache.db"),
+)
+MAX_BYTES = int(float(os.getenv("HTTP_CACHE_MAX_MB", "50")) * 1024 * 1024)
+
+_conn: Optional[sqlite3.Connection] = None
+_lock = threading.Lock()
+
+def _db() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("""
+        CREATE TABLE IF NOT EXISTS pages(
+            key TEXT PRIMARY KEY,
+            html BLOB,            -- zlib(html utf-8)
+            parsed TEXT,          -- JSON
+            etag TEXT,
+            last_modified TEXT,
+            fetched_at REAL,
+            expires_at REAL,
+            accessed_at REAL,
+            size INTEGER
+        )""")
+        _conn.commit()
+    return _conn
+
+def get(key: str, allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    {"parsed", "etag", "last_modified", "fetched_at", "expires_at"} или None.
+    allow_stale=True — отдать и протухшую запись.
+    """
+    if not ENABLED:
+        return None
+    now = time.time()
+    try:
+        with _lock:
+            conn = _db()
+            row = conn.execute(
+                "SELECT parsed, etag, last_modified, fetched_at, expires_at FROM pages WHERE key=?",
+                (key,),
+            ).fetchone()
+            if row is None or (not allow_stale and row[4] <= now):
+                return None
+            conn.execute("UPDATE pages SET accessed_at=? WHERE key=?", (now, key))
+            conn.commit()
+        return {
+            "parsed": json.loads(row[0]) if row[0] else None,
+            "etag": row[1],
+            "last_modified": row[2],
+            "fetched_at": row[3],
+            "expires_at": row[4],
+        }
+    except Exception:
+        return None
+
+def get_html(key: str) -> Optional[str]:
+    """Сырой HTML последней загрузки (для отладки/реплея парсера)."""
+    if not ENABLED:
+        return None
+    try:
+        with _lock:
+            row = _db().execute("SELECT html FROM pages WHERE key=?", (key,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row and row[0] else None
+    except Exception:
+        return None
+
+def put(key: str, html: Optional[str], parsed: Any, ttl: float,
+        etag: Optional[str] = None, last_modified: Optional[str] = None):
+    if not ENABLED:
+        return
+    now = time.time()
+    try:
+        blob = zlib.compress(html.encode("utf-8"), 6) if html else None
+        parsed_json = json.dumps(parsed, ensure_ascii=False) if parsed is not None else None
+        size = len(blob or b"") + len(parsed_json or "")
+        with _lock:
+            conn = _db()
+            conn.execute(
+                "INSERT OR REPLACE INTO pages(key, html, parsed, etag, last_modified, "
+                "fetched_at, expires_at, accessed_at, size) VALUES(?,?,?,?,?,?,?,?,?)",
+                (key, blob, parsed_json, etag, last_modified, now, now + ttl, now, size),
+            )
+            _evict_locked(conn)
+            conn.commit()
+    except Exception:
+        pass
+
+def touch(key: str, ttl: float):
+    """Страница не изменилась (304) — продлить срок записи."""
+    if not ENABLED:
+        return
+    now = time.time()
+    try:
+        with _lock:
+            conn = _db()
+            conn.execute(
+                "UPDATE pages SET expires_at=?, accessed_at=? WHERE key=?", (now + ttl, now, key)
+            )
+            conn.commit()
+    except Exception:
+        pass
+
+def _evict_locked(conn: sqlite3.Connection):
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+    if total <= MAX_BYTES:
+        return
+    for key, size in conn.execute("SELECT key, size FROM pages ORDER BY accessed_at").fetchall():
+        conn.execute("DELETE FROM pages WHERE key=?", (key,))
+        total -= size or 0
+        if total <= MAX_BYTES:
+            break
+
+def invalidate(key: Optional[str] = None):
+    if not ENABLED:
+        return
+    try:
+        with _lock:
+            conn = _db()
+            if key is None:
+                conn.execute("DELETE FROM pages")
+            else:
+                conn.execute("DELETE FROM pages WHERE key=?", (key,))
+            conn.commit()
+    except Exception:
+        pass
@@ -0,0 +1,57 @@
+# fonts.py
+# -*- coding: utf-8 -*-
+"""
+Реестр шрифтов для PNG-рендеров: путь ищется один раз на (family, bold, mono),
+объект FreeTypeFont создаётся один раз на (family, size, bold, mono) и переиспользуется.
+
+Семейства:
+    "sans" — таблицы Investing (DejaVu Sans / Arial; mono — DejaVu Sans Mono / Consolas)
+    "card" — карточка альтсезона (arial.ttf / DejaVuSans.ttf по имени, поиск Pillow)
+Если ни один файл не найден — встроенный шрифт Pillow.
+
+    get_font(family, size, bold=False, mono=False) -> ImageFont
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from PIL import ImageFont
+
+_CANDIDATES: Dict[Tuple[str, bool, bool], List[str]] = {
+    ("sans", False, False): [
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "C:/Windows/Fonts/arial.ttf",
+    ],
+    ("sans", True, False): [
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "C:/Windows/Fonts/arialbd.ttf",
+    ],
+    ("card", False, False): ["arial.ttf", "DejaVuSans.ttf"],
+}
+_MONO = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+    "C:/Windows/Fonts/consola.ttf",
+    "C:/Windows/Fonts/lucon.ttf",
+]
+
+@lru_cache(maxsize=None)
+def _resolve(family: str, bold: bool, mono: bool) -> Optional[str]:
+    """Первый загружаемый файл из кандидатов (или None)."""
+    paths = _MONO if mono else _CANDIDATES.get((family, bold, False), [])
+    for p in paths:
+        try:
+            ImageFont.truetype(p, size=10)
+            return p
+        except Exception:
+            continue
+    return None
+
+@lru_cache(maxsize=128)
+def get_font(family: str, size: int, bold: bool = False, mono: bool = False):
+    path = _resolve(family, bold, mono)
+    if path is not None:
+        try:
+            return ImageFont.truetype(path, size=size)
+        except Exception:
+            pass
+    return ImageFont.load_default()
@@ -0,0 +1,698 @@
+# http_client.py
+# -*- coding: utf-8 -*-
+"""
+Общий HTTP-слой для парсеров:
+
+- Асинхронный GET на общем пуле соединений aiohttp (keep-alive, лимит на хост)
+- Бэкофф через asyncio.sleep — event loop бота не блокируется
+- Если сайт режет «голый» клиент (403/429/503), идём через cloudscraper в отдельном потоке
+  и запоминаем хост, чтобы следующие запросы сразу шли через него
+- Пул долгоживущих cloudscraper-сессий на хост: keep-alive, cookies челленджа
+  переиспользуются, сессии с ошибками выбрасываются, старые — пересоздаются
+- Условные запросы: помним ETag/Last-Modified по url, шлём If-None-Match/If-Modified-Since,
+  на 304 отдаём статус 304 (вызывающий переиспользует уже распарсенное)
+- Лимит на хост (общий для всех путей): token bucket по частоте + потолок одновременных
+  запросов; 429/503 притормаживают хост. Метрики очереди — limiter_stats()
+- Circuit breaker на хост: после серии неудач запросы сразу получают ошибку [CIRCUIT],
+  по истечении паузы пропускается ровно один пробный запрос (half-open)
+
+Публичные функции:
+    fetch_text_async(url, headers=None, timeout=25, attempts=3, conditional=False)
+        -> (status, text|None, err|None, note)   # status 304 только при conditional=True
+    conditional_headers / remember_validators / get_validators / cached_body / forget_validators
+    limited(url) / limited_async(url) — обёртки-лимитеры вокруг любого исходящего запроса
+    get_breaker(url) -> CircuitBreaker, breaker_stats()
+    scraper_get(url, headers=None, timeout=25) -> requests.Response   # синхронно, из пула
+    close_async_session()
+    SingleFlight — склейка одинаковых конкурентных запросов в один
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+# Статусы, после которых пробуем cloudscraper (антибот / Cloudflare)
+_ANTIBOT_STATUSES = {403, 429, 503}
+# Сколько помнить, что хост пускает только через cloudscraper
+_SCRAPER_HOST_TTL = 30 * 60
+
+_session: Optional[aiohttp.ClientSession] = None
+_scraper_hosts: Dict[str, float] = {}
+
+def _host(url: str) -> str:
+    return (urlsplit(url).hostname or "").lower()
+
+async def get_async_session() -> aiohttp.ClientSession:
+    """Ленивая общая сессия aiohttp (создаётся внутри работающего loop)."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=100, limit_per_host=8, ttl_dns_cache=300)
+        _session = aiohttp.ClientSession(connector=connector)
+    return _session
+
+async def close_async_session():
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def _needs_scraper(host: str) -> bool:
+    ts = _scraper_hosts.get(host)
+    if ts is None:
+        return False
+    if time.monotonic() - ts > _SCRAPER_HOST_TTL:
+        _scraper_hosts.pop(host, None)
+        return False
+    return True
+
+# ================= валидаторы для условных запросов =================
+_validators: Dict[str, Dict[str, Optional[str]]] = {}   # url -> {etag, last_modified, body}
+_validators_lock = threading.Lock()
+
+def remember_validators(url: str, resp_headers, body: Optional[str] = None):
+    """Запомнить ETag/Last-Modified ответа 200 (body — если вызывающему нужен текст на 304)."""
+    etag = resp_headers.get("ETag")
+    last_modified = resp_headers.get("Last-Modified")
+    with _validators_lock:
+        if etag or last_modified:
+            _validators[url] = {"etag": etag, "last_modified": last_modified, "body": body}
+        else:
+            _validators.pop(url, None)
+
+def forget_validators(url: str):
+    with _validators_lock:
+        _validators.pop(url, None)
+
+def get_validators(url: str) -> Tuple[Optional[str], Optional[str]]:
+    """(etag, last_modified) последнего ответа 200 — чтобы сохранить их вместе со страницей."""
+    with _validators_lock:
+        v = _validators.get(url)
+    return (v.get("etag"), v.get("last_modified")) if v else (None, None)
+
+def cached_body(url: str) -> Optional[str]:
+    with _validators_lock:
+        v = _validators.get(url)
+        return v.get("body") if v else None
+
+def conditional_headers(url: str, headers: Optional[dict]) -> dict:
+    """Заголовки запроса + If-None-Match/If-Modified-Since, если валидаторы известны."""
+    out = dict(headers or {})
+    with _validators_lock:
+        v = _validators.get(url)
+    if not v:
+        return out
+    # no-cache/Pragma заставили бы CDN отдавать тело целиком; max-age=0 — ревалидация
+    out.pop("Pragma", None)
+    out["Cache-Control"] = "max-age=0"
+    if v.get("etag"):
+        out["If-None-Match"] = v["etag"]
+    if v.get("last_modified"):
+        out["If-Modified-Since"] = v["last_modified"]
+    return out
+
+# ================= лимиты на хост =================
+# (запросов/сек, всплеск, одновременных) — по умолчанию и для известных сайтов
+_DEFAULT_LIMIT = (
+    float(os.getenv("HTTP_RATE_PER_SEC", "1.0")),
+    int(os.getenv("HTTP_BURST", "3")),
+    int(os.getenv("HTTP_MAX_CONCURRENCY", "2")),
+)
+_HOST_LIMITS: Dict[str, Tuple[float, int, int]] = {
+    "investing.com": _DEFAULT_LIMIT,
+    # три зеркала ALTSEASON_URLS на одном хосте — hedged-запросы должны идти параллельно
+    "blockchaincenter.net": (1.0, 3, 3),
+}
+# пауза для хоста после 429/503 без Retry-After
+_THROTTLE_PENALTY = 5.0
+
+class HostLimiter:
+    """
+    Token bucket (rate запросов/сек, всплеск до burst) + max_concurrency слотов.
+    Работает и из потоков, и из event loop (асинхронный вход не блокирует loop).
+    Слоты выдаются строго по очереди (FIFO) — и потокам, и корутинам.
+    """
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int):
+        self.rate = max(rate, 0.01)
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        # слоты одновременных запросов: общий счётчик + FIFO-очередь ожидающих
+        # (threading.Event для потоков, (loop, future) для корутин)
+        self._free = max(1, max_concurrency)
+        self._waiters: Deque[Any] = deque()
+        # метрики
+        self.requests = 0
+        self.delayed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.queued = 0
+        self.queued_max = 0
+        self.in_flight = 0
+
+    def _reserve(self) -> float:
+        """Забрать токен; вернуть, сколько ждать до его «созревания»."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= 1
+            delay = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+            return max(delay, self._blocked_until - now)
+
+    def penalize(self, seconds: float):
+        """Притормозить хост (429/503, Retry-After)."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def _enter_queue(self):
+        with self._lock:
+            self.queued += 1
+            self.queued_max = max(self.queued_max, self.queued)
+
+    def _leave_queue(self, waited: float):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.requests += 1
+            if waited > 0.001:
+                self.delayed += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def _done(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._release_slot()
+
+    def _release_slot(self):
+        """Отдать слот первому в очереди (поток или корутина), иначе вернуть в счётчик."""
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                loop, fut = waiter
+                try:
+                    loop.call_soon_threadsafe(self._wake, fut)
+                    return
+                except RuntimeError:   # loop уже закрыт — ждать некому
+                    continue
+            self._free += 1
+
+    def _wake(self, fut: "asyncio.Future"):
+        if fut.cancelled():
+            self._release_slot()   # ожидающего отменили, пока слот шёл к нему
+        else:
+            fut.set_result(None)
+
+    def _take_slot(self):
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            ev = threading.Event()
+            self._waiters.append(ev)
+        try:
+            ev.wait()
+        except BaseException:
+            with self._lock:
+                try:
+                    self._waiters.remove(ev)
+                    handed = False
+                except ValueError:
+                    handed = True
+            if handed:
+                self._release_slot()
+            raise
+
+    async def _take_slot_async(self):
+        with self._lock:
+            if self._free > 0 and not self._waiters:
+                self._free -= 1
+                return
+            loop = asyncio.get_running_loop()
+            fut = loop.create_future()
+            waiter = (loop, fut)
+            self._waiters.append(waiter)
+        try:
+            await fut
+        except BaseException:
+            with self._lock:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            # слот уже выдан — вернуть; если выдача ещё в пути, вернёт _wake
+            if fut.done() and not fut.cancelled():
+                self._release_slot()
+            raise
+
+    @contextmanager
+    def acquire(self):
+        t0 = time.monotonic()
+        self._enter_queue()
+        got_slot = False
+        try:
+            self._take_slot()
+            got_slot = True
+            delay = self._reserve()
+            if delay > 0:
+                time.sleep(delay)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            if got_slot:
+                self._release_slot()
+            raise
+        self._leave_queue(time.monotonic() - t0)
+        try:
+            yield
+        finally:
+            self._done()
+
+    @asynccontextmanager
+    async def acquire_async(self):
+        t0 = time.monotonic()
+        self._enter_queue()
+        got_slot = False
+        try:
+            await self._take_slot_async()
+            got_slot = True
+            delay = self._reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except BaseException:
+            with self._lock:
+                self.queued -= 1
+            if got_slot:
+                self._release_slot()
+            raise
+        self._leave_queue(time.monotonic() - t0)
+        try:
+            yield
+        finally:
+            self._done()
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "delayed": self.delayed,
+                "wait_avg": round(self.wait_total / self.requests, 3) if self.requests else 0.0,
+                "wait_max": round(self.wait_max, 3),
+                "queued": self.queued,
+                "queued_max": self.queued_max,
+                "in_flight": self.in_flight,
+            }
+
+_limiters: Dict[str, HostLimiter] = {}
+_limiters_lock = threading.Lock()
+
+def _site(url: str) -> str:
+    """Ключ лимита: домен второго уровня (www./ru. investing.com — один сайт)."""
+    host = _host(url)
+    parts = host.split(".")
+    if len(parts) <= 2 or parts[-1].isdigit():   # короткое имя или IPv4
+        return host
+    return ".".join(parts[-2:])
+
+def get_limiter(url: str) -> HostLimiter:
+    site = _site(url)
+    with _limiters_lock:
+        lim = _limiters.get(site)
+        if lim is None:
+            lim = _limiters[site] = HostLimiter(*_HOST_LIMITS.get(site, _DEFAULT_LIMIT))
+        return lim
+
+def limited(url: str):
+    """with limited(url): <синхронный запрос>"""
+    return get_limiter(url).acquire()
+
+def limited_async(url: str):
+    """async with limited_async(url): <асинхронный запрос>"""
+    return get_limiter(url).acquire_async()
+
+def note_throttled(url: str, status: int, resp_headers=None):
+    """429/503 от сайта — притормозить весь хост (учитываем Retry-After в секундах)."""
+    if status not in (429, 503):
+        return
+    delay = _THROTTLE_PENALTY
+    try:
+        ra = (resp_headers or {}).get("Retry-After")
+        if ra:
+            delay = min(120.0, max(delay, float(ra)))
+    except Exception:
+        pass
+    get_limiter(url).penalize(delay)
+
+def limiter_stats() -> Dict[str, Dict[str, float]]:
+    with _limiters_lock:
+        items = list(_limiters.items())
+    return {site: lim.stats() for site, lim in items}
+
+# ================= circuit breaker =================
+CIRCUIT_FAILS = int(os.getenv("CIRCUIT_FAILS", "3"))                  # неудач подряд до размыкания
+CIRCUIT_COOLDOWN = float(os.getenv("CIRCUIT_COOLDOWN_SEC", "60"))     # пауза до пробного запроса
+
+class CircuitBreaker:
+    """
+    closed -> (fails подряд) -> open -> (cooldown) -> half_open: один пробный запрос
+    успех -> closed, неудача -> снова open.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, fails: int = CIRCUIT_FAILS, cooldown: float = CIRCUIT_COOLDOWN):
+        self.fails = max(1, fails)
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Можно ли идти в сеть. В half_open разрешает только один пробный вызов."""
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            self.rejected += 1
+            return False
+
+    @property
+    def half_open(self) -> bool:
+        return self.state == self.HALF_OPEN
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def abort(self):
+        """Вызов отменён без результата — освободить слот пробного запроса."""
+        with self._lock:
+            self._probing = False
+
+    def record(self, ok: bool):
+        with self._lock:
+            self._probing = False
+            if ok:
+                self.state = self.CLOSED
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.fails:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"state": self.state, "failures": self.failures, "rejected": self.rejected}
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(url: str) -> CircuitBreaker:
+    site = _site(url)
+    with _limiters_lock:
+        br = _breakers.get(site)
+        if br is None:
+            br = _breakers[site] = CircuitBreaker()
+        return br
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    with _limiters_lock:
+        items = list(_breakers.items())
+    return {site: br.stats() for site, br in items}
+
+def host_failed(status: int) -> bool:
+    """Считается ли ответ отказом хоста (а не, скажем, 404 на кривой ссылке)."""
+    return status == 0 or status >= 500 or status in (403, 429)
+
+def circuit_error(url: str) -> str:
+    br = get_breaker(url)
+    return f"[CIRCUIT] {_site(url)} недоступен, повтор через {br.retry_in():.0f} с"
+
+# ================= пул cloudscraper-сессий =================
+class _PooledScraper:
+    __slots__ = ("session", "created", "failures")
+
+    def __init__(self, session):
+        self.session = session
+        self.created = time.monotonic()
+        self.failures = 0
+
+class ScraperPool:
+    """
+    Ограниченный пул cloudscraper-сессий на хост.
+    - не больше max_per_host сессий на хост (лишние запросы ждут свободную)
+    - сессия старше max_age пересоздаётся (свежие cookies челленджа)
+    - после max_failures ошибок подряд или антибот-ответа сессия выбрасывается
+    """
+
+    def __init__(self, max_per_host: int = 4, max_age: float = 20 * 60, max_failures: int = 2):
+        self.max_per_host = max(1, max_per_host)
+        self.max_age = max_age
+        self.max_failures = max_failures
+        self._cond = threading.Condition()
+        self._idle: Dict[str, List[_PooledScraper]] = {}
+        self._total: Dict[str, int] = {}
+
+    def _create(self) -> _PooledScraper:
+        import cloudscraper  # type: ignore
+        return _PooledScraper(cloudscraper.create_scraper())
+
+    def _healthy(self, item: _PooledScraper) -> bool:
+        return item.failures < self.max_failures and time.monotonic() - item.created < self.max_age
+
+    def _acquire(self, host: str) -> _PooledScraper:
+        with self._cond:
+            while True:
+                idle = self._idle.setdefault(host, [])
+                while idle:
+                    item = idle.pop()
+                    if self._healthy(item):
+                        return item
+                    self._discard_locked(host, item)
+                if self._total.get(host, 0) < self.max_per_host:
+                    self._total[host] = self._total.get(host, 0) + 1
+                    break
+                self._cond.wait()
+        try:
+            return self._create()
+        except Exception:
+            with self._cond:
+                self._total[host] -= 1
+                self._cond.notify()
+            raise
+
+    def _discard_locked(self, host: str, item: _PooledScraper):
+        self._total[host] = max(0, self._total.get(host, 0) - 1)
+        try:
+            item.session.close()
+        except Exception:
+            pass
+
+    def _release(self, host: str, item: _PooledScraper):
+        with self._cond:
+            if self._healthy(item):
+                self._idle.setdefault(host, []).append(item)
+            else:
+                self._discard_locked(host, item)
+            self._cond.notify()
+
+    @contextmanager
+    def session(self, url: str):
+        """Выдаёт PooledScraper эксклюзивно на время запроса."""
+        host = _host(url)
+        item = self._acquire(host)
+        try:
+            yield item
+        except Exception:
+            item.failures += 1
+            raise
+        finally:
+            self._release(host, item)
+
+    def get(self, url: str, headers: Optional[dict] = None, timeout: float = 25, limit: bool = True):
+        """
+        limit=False — слот лимитера уже взят вызывающим (асинхронный путь берёт его в event loop).
+        Лимитер берётся до сессии: ждущие своей очереди не держат сессии пула.
+        """
+        with (limited(url) if limit else nullcontext()), self.session(url) as item:
+            r = item.session.get(url, headers=headers, timeout=timeout)
+            note_throttled(url, r.status_code, r.headers)
+            if r.status_code in _ANTIBOT_STATUSES:
+                # cookies челленджа протухли/не приняты — сессию не переиспользуем
+                item.failures = self.max_failures
+            elif r.status_code < 500:
+                item.failures = 0
+            else:
+                item.failures += 1
+            return r
+
+    def close(self):
+        with self._cond:
+            for host, idle in self._idle.items():
+                for item in idle:
+                    self._discard_locked(host, item)
+            self._idle.clear()
+
+SCRAPER_POOL = ScraperPool(
+    # не меньше лимита одновременных запросов: тогда взявший слот лимитера не ждёт сессию
+    max_per_host=int(os.getenv("SCRAPER_POOL_SIZE", str(max(4, _DEFAULT_LIMIT[2])))),
+    max_age=float(os.getenv("SCRAPER_MAX_AGE_SEC", str(20 * 60))),
+)
+
+def scraper_get(url: str, headers: Optional[dict] = None, timeout: float = 25):
+    """Блокирующий GET через сессию из пула cloudscraper. Возвращает requests.Response."""
+    return SCRAPER_POOL.get(url, headers=headers, timeout=timeout)
+
+def _scraper_get(url: str, headers: Optional[dict], timeout: float) -> Tuple[int, str, Any]:
+    """
+    Блокирующий GET через cloudscraper — вызывается только из потока.
+    Слот лимитера вызывающий берёт сам (limited_async), поток по лимиту не ждёт.
+    """
+    r = SCRAPER_POOL.get(url, headers=headers, timeout=timeout, limit=False)
+    return r.status_code, r.text, r.headers
+
+async def fetch_text_async(url: str, headers: Optional[dict] = None, timeout: float = 25,
+                           attempts: int = 3, conditional: bool = False, keep_body: bool = False
+                           ) -> Tuple[int, Optional[str], Optional[str], str]:
+    """
+    Неблокирующий GET: aiohttp -> cloudscraper (в потоке), attempts попыток с backoff.
+    Возврат: (status_code, text|None, err|None, debug_note) — как у синхронного _get.
+    conditional=True — слать известные валидаторы; ответ 304 возвращается как (304, None, None, note).
+    keep_body=True — хранить тело рядом с валидаторами и на 304 отдавать его как 200.
+    Валидаторы ответа 200 запоминаются всегда.
+    Хост с разомкнутым circuit breaker — сразу (0, None, "[CIRCUIT] ...", note).
+    """
+    breaker = get_breaker(url)
+    if not breaker.allow():
+        return 0, None, circuit_error(url), "circuit open"
+    if breaker.half_open:
+        attempts = 1   # пробный запрос — без ретраев
+    if keep_body and cached_body(url) is None:
+        conditional = False   # на 304 нечего было бы отдать
+    try:
+        code, text, err, note, last_status = await _fetch_text_async(
+            url, headers, timeout, attempts, conditional, keep_body
+        )
+    except BaseException:
+        breaker.abort()   # отмена (hedged-запросы) не должна «залипать» в half_open
+        raise
+    breaker.record(code in (200, 304) or not host_failed(last_status))
+    if code == 304 and keep_body:
+        body = cached_body(url)
+        if body is not None:
+            return 200, body, None, note + "; 304 -> cached body"
+    return code, text, err, note
+
+async def _fetch_text_async(url, headers, timeout, attempts, conditional, keep_body):
+    host = _host(url)
+    breaker = get_breaker(url)
+    last_err = None
+    last_status = 0
+    notes = []
+    if conditional:
+        headers = conditional_headers(url, headers)
+    for attempt in range(attempts):
+        if attempt and breaker.is_open():
+            notes.append("circuit opened meanwhile")
+            break
+        use_scraper = _needs_scraper(host)
+        if not use_scraper:
+            try:
+                session = await get_async_session()
+                async with limited_async(url), session.get(
+                    url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)
+                ) as r:
+                    status = r.status
+                    text = await r.text(errors="replace")
+                    resp_headers = r.headers
+                note_throttled(url, status, resp_headers)
+                notes.append(f"try{attempt+1}: aiohttp -> HTTP {status}")
+                last_status = status
+                if status == 304 and conditional:
+                    return status, None, None, "; ".join(notes), status
+                if status == 200 and text:
+                    remember_validators(url, resp_headers, body=text if keep_body else None)
+                    return status, text, None, "; ".join(notes), status
+                last_err = f"[NET] aiohttp HTTP {status}"
+                use_scraper = status in _ANTIBOT_STATUSES
+            except Exception as e:
+                last_err = f"[NET] aiohttp fail: {e!r}"
+                last_status = 0
+                notes.append(str(last_err))
+
+        if use_scraper:
+            try:
+                # ждём лимит в event loop, а не в потоке: потоки executor'а нужны и кэшу
+                async with limited_async(url):
+                    status, text, resp_headers = await asyncio.to_thread(_scraper_get, url, headers, timeout)
+                notes.append(f"try{attempt+1}: cloudscraper -> HTTP {status}")
+                last_status = status
+                if status == 304 and conditional:
+                    _scraper_hosts[host] = time.monotonic()
+                    return status, None, None, "; ".join(notes), status
+                if status == 200 and text:
+                    _scraper_hosts[host] = time.monotonic()
+                    remember_validators(url, resp_headers, body=text if keep_body else None)
+                    return status, text, None, "; ".join(notes), status
+                last_err = f"[NET] cloudscraper HTTP {status}"
+            except Exception as e:
+                last_err = f"[NET] cloudscraper fail: {e}"
+                last_status = 0
+                notes.append(str(last_err))
+
+        if attempt < attempts - 1:
+            await asyncio.sleep(0.6 * (2 ** attempt))  # 0.6, 1.2
+
+    return 0, None, last_err or "[NET] network error", "; ".join(notes), last_status
+
+# ================= single-flight =================
+class SingleFlight:
+    """
+    Конкурентные вызовы с одним ключом ждут ОДНУ задачу и получают её результат.
+    Задача не отменяется, если отменили одного из ожидающих (shield).
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            self.started += 1
+        else:
+            self.joined += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"inflight": len(self._inflight), "started": self.started, "joined": self.joined}
@@ -2,14 +2,27 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import asyncio
+import bisect
+import os
 import re
+import time
 import datetime as dt
+from functools import lru_cache
 from io import BytesIO
-from typing import Dict, Optional, Tuple, List
+from typing import Any, Callable, Dict, Optional, Tuple, List, TypeVar
 
-import requests
 from bs4 import BeautifulSoup, Tag
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw
+
+import disk_cache
+from cache import TTLCache
+from cpu_pool import run_cpu
+from fonts import get_font
+from http_client import (
+    SingleFlight, cached_body, circuit_error, conditional_headers, fetch_text_async,
+    forget_validators, get_breaker, host_failed, remember_validators, scraper_get,
+)
 
 # --------- источники (пробуем по очереди) ---------
 ALTSEASON_URLS = [
@@ -25,22 +38,125 @@ HEADERS = {
     )
 }
 TIMEOUT = 12
+# через сколько секунд страховать медленное зеркало следующим (0 — все зеркала сразу)
+HEDGE_DELAY = float(os.getenv("ALTSEASON_HEDGE_DELAY", "1.5"))
+
+T = TypeVar("T")
 
 # ======================== базовые утилиты ========================
-def _fetch_html(url: str) -> str:
-    r = requests.get(url, headers=HEADERS, timeout=TIMEOUT)
-    r.raise_for_status()
-    return r.text
+def _fetch_html(url: str, timeout: int = TIMEOUT) -> str:
+    # сессия из общего пула cloudscraper: keep-alive и cookies между вызовами;
+    # запрос условный — на 304 отдаём тело, сохранённое с прошлого 200;
+    # при разомкнутом circuit breaker — сразу ошибка, без ожидания таймаута
+    breaker = get_breaker(url)
+    if not breaker.allow():
+        raise RuntimeError(circuit_error(url))
+    status = 0
+    try:
+        r = scraper_get(url, headers=conditional_headers(url, HEADERS), timeout=timeout)
+        status = r.status_code
+        if r.status_code == 304:
+            body = cached_body(url)
+            if body is not None:
+                return body
+            forget_validators(url)
+            r = scraper_get(url, headers=HEADERS, timeout=timeout)
+            status = r.status_code
+        r.raise_for_status()
+        remember_validators(url, r.headers, body=r.text)
+        return r.text
+    finally:
+        breaker.record(status in (200, 304) or not host_failed(status))
+
+# последний разбор страницы каждым парсером: (url, parse) -> (html, результат).
+# На 304 fetch отдаёт сохранённое тело — совпало с разобранным, значит не парсим заново
+_LAST_PARSE: Dict[Tuple[str, Callable[[str], Any]], Tuple[str, Any]] = {}
+
+def _parsed_before(url: str, parse: Callable[[str], T], html: str) -> Optional[T]:
+    entry = _LAST_PARSE.get((url, parse))
+    if entry is not None and entry[0] == html:
+        return entry[1]
+    return None
+
+def _parse_page(url: str, parse: Callable[[str], T], html: str) -> T:
+    """parse(html) с переиспользованием прошлого результата для той же страницы (304)."""
+    result = _parsed_before(url, parse, html)
+    if result is None:
+        result = parse(html)
+        _LAST_PARSE[(url, parse)] = (html, result)
+    return result
+
+async def _hedged_fetch(parse: Callable[[str], T], timeout: float, hedge_delay: float) -> Tuple[T, str, str]:
+    """
+    Hedged-запрос по ALTSEASON_URLS: зеркало i+1 запускается, если за hedge_delay сек
+    ни одно не ответило (или сразу, как только предыдущее упало). Первый успешный
+    parse(html) побеждает, остальные запросы отменяются. Возврат: (результат, url, html).
+    html остаётся в этом процессе — из воркера возвращается только результат разбора.
+    """
+    async def attempt(url: str):
+        code, html, err, _ = await fetch_text_async(
+            url, headers=HEADERS, timeout=timeout, attempts=1, conditional=True, keep_body=True
+        )
+        if code != 200 or not html:
+            raise RuntimeError(err or f"HTTP {code}")
+        result = _parsed_before(url, parse, html)   # 304 -> то же тело, разбор уже есть
+        if result is None:
+            # разбор — в пуле процессов: event loop свободен, зеркала не ждут друг друга
+            result = await run_cpu(parse, html)
+            _LAST_PARSE[(url, parse)] = (html, result)
+        return result, url, html
+
+    urls = iter(ALTSEASON_URLS)
+    pending = set()
+    errors: List[str] = []
+
+    def launch() -> bool:
+        url = next(urls, None)
+        if url is None:
+            return False
+        pending.add(asyncio.ensure_future(attempt(url)))
+        return True
+
+    launch()
+    if hedge_delay <= 0:
+        while launch():
+            pass
+    try:
+        while pending:
+            done, _ = await asyncio.wait(
+                pending, timeout=hedge_delay if hedge_delay > 0 else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                launch()   # медленное зеркало — страхуемся следующим
+                continue
+            for task in done:
+                pending.discard(task)
+                if task.exception() is None:
+                    return task.result()
+                errors.append(str(task.exception()))
+            launch()       # зеркало упало — следующее сразу, без ожидания
+    finally:
+        for task in pending:
+            task.cancel()
+    raise ValueError(errors[-1] if errors else "неизвестная ошибка")
+
+_RE_NUM_0_100 = re.compile(r"(?<!\d)(\d{1,3})(?!\d)")
+_RE_INDEX_DIRECT = re.compile(
+    r"(Altcoin\s+Season\s+Index|Индекс\s+сезона\s+альткоинов)[^\d]{0,40}(\d{1,3})", re.I
+)
+# якоря «текущего значения» одним проходом (ключевые слова не перекрываются)
+_RE_INDEX_ANCHORS = re.compile(
+    "|".join(["Сейчас", "текущ", "current", "Now", "Altcoin Season Index", "Индекс сезона альткоинов"]),
+    re.I,
+)
 
 def _find_numbers_0_100(text: str) -> List[Tuple[int, int]]:
     """Вернёт все числа 0..100 и их позиции в тексте."""
     nums: List[Tuple[int, int]] = []
-    for m in re.finditer(r"(?<!\d)(\d{1,3})(?!\d)", text):
-        try:
-            v = int(m.group(1))
-        except ValueError:
-            continue
-        if 0 <= v <= 100:
+    for m in _RE_NUM_0_100.finditer(text):
+        v = int(m.group(1))
+        if v <= 100:
             nums.append((v, m.start()))
     return nums
 
@@ -51,31 +167,35 @@ def _extract_index_heuristic(html: str) -> int:
       2) число ближе всего к якорям 'current/Сейчас'
       3) фолбэк — разумные числа 30..90 (не 25/75)
     """
-    soup = BeautifulSoup(html, "html.parser")
+    return _extract_index_from_soup(BeautifulSoup(html, "html.parser"))
+
+def _nearest_distance(anchors: List[int], pos: int) -> int:
+    """Расстояние до ближайшего якоря; anchors отсортирован по возрастанию."""
+    i = bisect.bisect_left(anchors, pos)
+    best = anchors[i] - pos if i < len(anchors) else None
+    if i > 0 and (best is None or pos - anchors[i - 1] < best):
+        best = pos - anchors[i - 1]
+    return best
+
+def _extract_index_from_soup(soup: BeautifulSoup) -> int:
     text = soup.get_text("\n", strip=True)
 
-    m = re.search(r"(Altcoin\s+Season\s+Index|Индекс\s+сезона\s+альткоинов)[^\d]{0,40}(\d{1,3})", text, re.I)
+    m = _RE_INDEX_DIRECT.search(text)
     if m:
         v = int(m.group(2))
         if 0 <= v <= 100:
             return v
 
-    anchors = []
-    for kw in ["Сейчас", "текущ", "current", "Now", "Altcoin Season Index", "Индекс сезона альткоинов"]:
-        for a in re.finditer(kw, text, flags=re.I):
-            anchors.append(a.start())
+    anchors = [a.start() for a in _RE_INDEX_ANCHORS.finditer(text)]   # уже по возрастанию
 
     nums = _find_numbers_0_100(text)
     if not nums:
         raise ValueError("Не нашли чисел 0–100 на странице")
 
     if anchors:
-        def dist(npos: int) -> int:
-            return min(abs(npos - a) for a in anchors)
-
         # отфильтруем очевидные линии-пороги
         filtered = [(v, pos) for (v, pos) in nums if v not in (0, 25, 75, 100)]
-        pick = min(filtered or nums, key=lambda t: dist(t[1]))
+        pick = min(filtered or nums, key=lambda t: _nearest_distance(anchors, t[1]))
         return pick[0]
 
     for v, _ in nums:
@@ -93,13 +213,24 @@ def fetch_altseason_index() -> Tuple[int, str]:
     for url in ALTSEASON_URLS:
         try:
             html = _fetch_html(url)
-            value = _extract_index_heuristic(html)
+            value = _parse_page(url, _extract_index_heuristic, html)
             return value, url
         except Exception as e:
             last_error = str(e)
             continue
     raise ValueError(f"Не удалось распознать индекс на странице: {last_error or 'неизвестная ошибка'}")
 
+async def fetch_altseason_index_async(hedge_delay: float = HEDGE_DELAY) -> Tuple[int, str]:
+    """
+    Как fetch_altseason_index, но не блокирует event loop и не ждёт медленное зеркало:
+    следующее зеркало стартует через hedge_delay сек (0 — все сразу), берём первый успешный разбор.
+    """
+    try:
+        value, url, _ = await _hedged_fetch(_extract_index_heuristic, timeout=TIMEOUT, hedge_delay=hedge_delay)
+    except ValueError as e:
+        raise ValueError(f"Не удалось распознать индекс на странице: {e}") from None
+    return value, url
+
 def classify_altseason(value: int) -> Tuple[str, str]:
     """
     Классификация и подсказка:
@@ -185,12 +316,21 @@ _LABEL_VARIANTS = {
     ],
 }
 
+# нормализованный вариант -> ключ; порядок — как в _LABEL_VARIANTS (важен для подстрок)
+_VARIANT_KEYS: Dict[str, str] = {
+    _normalize(v): key for key, variants in _LABEL_VARIANTS.items() for v in variants
+}
+
+@lru_cache(maxsize=256)
 def _match_key(label_norm: str) -> Optional[str]:
-    # 1) точные варианты
-    for key, variants in _LABEL_VARIANTS.items():
-        for v in variants:
-            if _normalize(v) in label_norm:
-                return key
+    # 0) метка ровно как на сайте — один поиск в словаре
+    key = _VARIANT_KEYS.get(label_norm)
+    if key is not None:
+        return key
+    # 1) точные варианты внутри метки
+    for v, key in _VARIANT_KEYS.items():
+        if v in label_norm:
+            return key
     # 2) фуззи: набор ключевых слов (все должны встретиться)
     for key, bundles in _KEYWORDS.items():
         for kws in bundles:
@@ -214,54 +354,67 @@ def fetch_altseason_stats(timeout: int = 12) -> Dict[str, Dict[str, Optional[int
     html = None
     for url in ALTSEASON_URLS:
         try:
-            r = requests.get(url, headers=HEADERS, timeout=timeout)
-            r.raise_for_status()
-            html = r.text
+            html = _fetch_html(url, timeout=timeout)
             break
         except Exception as e:
             last_err = e
     if html is None:
         raise RuntimeError(f"Не удалось загрузить страницу: {last_err}")
+    return _parse_page(url, _parse_stats, html)
 
-    soup = BeautifulSoup(html, "html.parser")
+async def fetch_altseason_stats_async(timeout: int = 12,
+                                      hedge_delay: float = HEDGE_DELAY) -> Dict[str, Dict[str, Optional[int]]]:
+    """Как fetch_altseason_stats, но зеркала опрашиваются hedged (см. _hedged_fetch)."""
+    try:
+        stats, _, _ = await _hedged_fetch(_parse_stats, timeout=timeout, hedge_delay=hedge_delay)
+    except ValueError as e:
+        raise RuntimeError(str(e)) from None
+    return stats
 
-    # ---------- 1) найдём заголовок "Altcoin Season Index" и ближайшую таблицу Altcoin/Bitcoin ----------
-    hdr = soup.find(string=re.compile(r"(Altcoin\s+Season\s+Index|Индекс\s+сезона\s+альткоинов)", re.I))
-    target_table: Optional[Tag] = None
-    if hdr:
-        node = hdr.parent
-        for _ in range(200):
-            node = node.find_next()
-            if node is None:
-                break
-            if node.name == "table":
-                first = node.find("tr")
-                if first:
-                    cols = [c.get_text(" ", strip=True) for c in first.find_all(["th", "td"])]
-                    if len(cols) == 3:
-                        h2, h3 = _normalize(cols[1]), _normalize(cols[2])
-                        if ("altcoin" in h2 and "bitcoin" in h3) or ("альт" in h2 and "биткоин" in h3):
-                            target_table = node
-                            break
-
-    # ---------- 2) фолбэк: просто ищем первую таблицу формата [label | Altcoin | Bitcoin] ----------
-    if target_table is None:
-        for tbl in soup.find_all("table"):
-            first = tbl.find("tr")
-            if not first:
-                continue
-            cols = [c.get_text(" ", strip=True) for c in first.find_all(["th", "td"])]
-            if len(cols) != 3:
-                continue
-            h2, h3 = _normalize(cols[1]), _normalize(cols[2])
-            if ("altcoin" in h2 and "bitcoin" in h3) or ("альт" in h2 and "биткоин" in h3):
-                target_table = tbl
-                break
+def _parse_stats(html: str) -> Dict[str, Dict[str, Optional[int]]]:
+    return _parse_stats_soup(BeautifulSoup(html, "html.parser"))
+
+_RE_INDEX_HEADER = re.compile(r"(Altcoin\s+Season\s+Index|Индекс\s+сезона\s+альткоинов)", re.I)
+
+def _is_stats_table(tbl: Tag) -> bool:
+    """Таблица формата [label | Altcoin | Bitcoin] (по первой строке)."""
+    first = tbl.find("tr")
+    if not first:
+        return False
+    cols = [c.get_text(" ", strip=True) for c in first.find_all(["th", "td"])]
+    if len(cols) != 3:
+        return False
+    h2, h3 = _normalize(cols[1]), _normalize(cols[2])
+    return ("altcoin" in h2 and "bitcoin" in h3) or ("альт" in h2 and "биткоин" in h3)
 
+def _locate_stats_table(soup: BeautifulSoup) -> Optional[Tag]:
+    """
+    Первая таблица [label | Altcoin | Bitcoin] после заголовка 'Altcoin Season Index'
+    (позиция в исходнике сравнивается с заголовком), иначе — первая такая таблица на странице.
+    """
+    tables = [t for t in soup.find_all("table") if _is_stats_table(t)]
+    if len(tables) <= 1:
+        return tables[0] if tables else None   # выбирать не из чего — заголовок не ищем
+
+    hdr = soup.find(string=_RE_INDEX_HEADER)
+    if hdr is None:
+        return tables[0]
+    anchor = hdr.parent
+    if anchor.sourceline is not None:
+        pos = (anchor.sourceline, anchor.sourcepos)
+        after = next((t for t in tables if (t.sourceline, t.sourcepos) > pos), None)
+    else:
+        # бэкенд без позиций в исходнике — по порядку документа
+        ids = {id(t) for t in tables}
+        after = next((t for t in anchor.find_all_next("table") if id(t) in ids), None)
+    return after or tables[0]
+
+def _parse_stats_soup(soup: BeautifulSoup) -> Dict[str, Dict[str, Optional[int]]]:
+    target_table = _locate_stats_table(soup)
     if target_table is None:
         raise RuntimeError("Таблица Altcoin/Bitcoin для секции 'Altcoin Season' не найдена")
 
-    # ---------- 3) парсим строки ----------
+    # ---------- парсим строки ----------
     stats: Dict[str, Dict[str, Optional[int]]] = {}
     for tr in target_table.find_all("tr")[1:]:
         tds = tr.find_all(["td", "th"])
@@ -283,6 +436,78 @@ def fetch_altseason_stats(timeout: int = 12) -> Dict[str, Dict[str, Optional[int
 
     return stats
 
+# ======================== снимок: индекс + сводка за один запрос ========================
+SNAPSHOT_TTL = int(os.getenv("ALTSEASON_SNAPSHOT_TTL_SEC", "300"))   # индекс меняется медленно
+_SNAPSHOT_CACHE = TTLCache(maxsize=4)
+_SNAPSHOT_FLIGHT = SingleFlight()
+_SNAPSHOT_DISK_KEY = "altseason:snapshot"
+
+def _cached_snapshot() -> Optional[Dict[str, Any]]:
+    """Снимок из памяти, а после рестарта — ещё не протухший снимок с диска."""
+    snap = _SNAPSHOT_CACHE.get("snapshot")
+    if snap is not None:
+        return snap
+    entry = disk_cache.get(_SNAPSHOT_DISK_KEY)
+    snap = entry and entry.get("parsed")
+    if not isinstance(snap, dict) or snap.get("index") is None:
+        return None
+    _SNAPSHOT_CACHE.set("snapshot", snap, max(0.0, entry["expires_at"] - time.time()))
+    return snap
+
+def _store_snapshot(snap: Dict[str, Any], html: str):
+    _SNAPSHOT_CACHE.set("snapshot", snap, SNAPSHOT_TTL)
+    disk_cache.put(_SNAPSHOT_DISK_KEY, html, snap, SNAPSHOT_TTL)
+
+def _parse_snapshot(html: str) -> Dict[str, Any]:
+    """Один BeautifulSoup на индекс и сводку. Без индекса — ошибка, без сводки — stats_error."""
+    soup = BeautifulSoup(html, "html.parser")
+    index = _extract_index_from_soup(soup)
+    stats, stats_error = None, None
+    try:
+        stats = _parse_stats_soup(soup)
+    except Exception as e:
+        stats_error = str(e)
+    return {"index": index, "stats": stats, "stats_error": stats_error}
+
+def fetch_altseason_snapshot(use_cache: bool = True) -> Dict[str, Any]:
+    """
+    Индекс и сводка из ОДНОЙ загрузки страницы:
+      {"index": 37, "url": used_url, "stats": {...} | None, "stats_error": str | None}
+    Бросает ValueError, если индекс не распознан ни на одном зеркале.
+    """
+    if use_cache:
+        snap = _cached_snapshot()
+        if snap is not None:
+            return snap
+    last_error: Optional[str] = None
+    for url in ALTSEASON_URLS:
+        try:
+            html = _fetch_html(url)
+            snap = dict(_parse_page(url, _parse_snapshot, html), url=url)
+            _store_snapshot(snap, html)
+            return snap
+        except Exception as e:
+            last_error = str(e)
+    raise ValueError(f"Не удалось распознать индекс на странице: {last_error or 'неизвестная ошибка'}")
+
+async def fetch_altseason_snapshot_async(use_cache: bool = True,
+                                         hedge_delay: float = HEDGE_DELAY) -> Dict[str, Any]:
+    """Как fetch_altseason_snapshot: hedged по зеркалам, конкурентные вызовы делят один запрос."""
+    if use_cache:
+        snap = await asyncio.to_thread(_cached_snapshot)
+        if snap is not None:
+            return snap
+    return await _SNAPSHOT_FLIGHT.do("snapshot", lambda: _fetch_snapshot_async(hedge_delay))
+
+async def _fetch_snapshot_async(hedge_delay: float) -> Dict[str, Any]:
+    try:
+        snap, url, html = await _hedged_fetch(_parse_snapshot, timeout=TIMEOUT, hedge_delay=hedge_delay)
+    except ValueError as e:
+        raise ValueError(f"Не удалось распознать индекс на странице: {e}") from None
+    snap = dict(snap, url=url)
+    await asyncio.to_thread(_store_snapshot, snap, html)
+    return snap
+
 def format_altseason_stats(stats: Dict[str, Dict[str, Optional[int]]]) -> str:
     """Формат сводки для Telegram."""
     def g(k):
@@ -311,13 +536,8 @@ def format_altseason_stats(stats: Dict[str, Dict[str, Optional[int]]]) -> str:
 
 # ======================== отрисовка PNG-карточки ========================
 def _try_font(size: int):
-    """Пробуем системные шрифты; если нет — встроенный."""
-    for name in ["arial.ttf", "DejaVuSans.ttf"]:
-        try:
-            return ImageFont.truetype(name, size)
-        except Exception:
-            pass
-    return ImageFont.load_default()
+    """Системный шрифт (arial / DejaVuSans), иначе встроенный; кэшируется в fonts.py."""
+    return get_font("card", size)
 
 def _text_size(drw: ImageDraw.ImageDraw, text: str, font) -> tuple[int, int]:
     """Безопасно получаем ширину/высоту текста для разных версий Pillow."""
@@ -327,18 +547,33 @@ def _text_size(drw: ImageDraw.ImageDraw, text: str, font) -> tuple[int, int]:
     except Exception:
         return drw.textsize(text, font=font)
 
-def render_altseason_card(value: int, width: int = 900, height: int = 220) -> Tuple[bytes, str]:
+# геометрия карточки (общая для статичной подложки и значения)
+_CARD_PAD = 20
+_CARD_BAR_H = 36
+
+def _bar_color(t: float) -> Tuple[int, int, int]:
+    """Цвет шкалы в точке t ∈ [0, 1] (градиент по зонам)."""
+    def lerp(a, b, t): return int(a + (b - a) * t)
+
+    if t <= 0.25:  # оранж
+        return (lerp(255, 255, t / .25), lerp(140, 200, t / .25), 0)
+    if t <= 0.69:  # нейтральная
+        tt = (t - .25) / .44
+        return (lerp(220, 140, tt), lerp(220, 230, tt), lerp(220, 240, tt))
+    tt = (t - .69) / .31  # зелёная
+    return (lerp(140, 0, tt), lerp(230, 200, tt), lerp(140, 60, tt))
+
+@lru_cache(maxsize=8)
+def _card_base(width: int, height: int) -> Image.Image:
     """
-    Рисует горизонтальную шкалу 0..100 с отметками 25/69/75 и текущим значением.
-    Возвращает (png_bytes, filename).
+    Всё, что не зависит от значения: фон, заголовок, градиентная шкала, отметки 25/69/75,
+    подписи 0/100. Рисуется один раз на размер; рендер значения идёт по копии.
     """
-    pad = 20
-    bar_h = 36
+    pad, bar_h = _CARD_PAD, _CARD_BAR_H
     img = Image.new("RGB", (width, height), (18, 18, 22))
     drw = ImageDraw.Draw(img)
 
     f_title = _try_font(28)
-    f_val = _try_font(46)
     f_small = _try_font(18)
 
     # Заголовок
@@ -350,20 +585,12 @@ def render_altseason_card(value: int, width: int = 900, height: int = 220) -> Tu
     bar_top = pad + 52
     bar_bottom = bar_top + bar_h
 
-    # Градиент по зонам
-    def lerp(a, b, t): return int(a + (b - a) * t)
-
-    for x in range(bar_left, bar_right):
-        t = (x - bar_left) / (bar_right - bar_left)
-        if t <= 0.25:  # оранж
-            col = (lerp(255, 255, t / .25), lerp(140, 200, t / .25), 0)
-        elif t <= 0.69:  # нейтральная
-            tt = (t - .25) / .44
-            col = (lerp(220, 140, tt), lerp(220, 230, tt), lerp(220, 240, tt))
-        else:  # зелёная
-            tt = (t - .69) / .31
-            col = (lerp(140, 0, tt), lerp(230, 200, tt), lerp(140, 60, tt))
-        drw.line([(x, bar_top), (x, bar_bottom)], fill=col)
+    # Градиент: одна строка пикселей, растянутая по высоте шкалы
+    span = bar_right - bar_left
+    row = bytes(c for x in range(span) for c in _bar_color(x / span))
+    if span > 0:
+        strip = Image.frombytes("RGB", (span, 1), row).resize((span, bar_bottom - bar_top + 1), Image.NEAREST)
+        img.paste(strip, (bar_left, bar_top))
 
     # Отметки 25 / 69 / 75
     def mark(xpos: int, text: str):
@@ -375,16 +602,39 @@ def render_altseason_card(value: int, width: int = 900, height: int = 220) -> Tu
         x = int(bar_left + (bar_right - bar_left) * (p / 100.0))
         mark(x, t)
 
+    drw.text((pad, bar_top - 48), "0", fill=(180, 180, 190), font=f_small)
+    drw.text((bar_right - 14, bar_top - 48), "100", fill=(180, 180, 190), font=f_small)
+    return img
+
+def render_altseason_card(value: int, width: int = 900, height: int = 220) -> Tuple[bytes, str]:
+    """
+    Рисует горизонтальную шкалу 0..100 с отметками 25/69/75 и текущим значением.
+    Возвращает (png_bytes, filename).
+    """
+    # значений всего 101 — готовые PNG тоже держим в кэше
+    return _render_card(max(0, min(100, int(value))), width, height)
+
+@lru_cache(maxsize=128)
+def _render_card(v: int, width: int, height: int) -> Tuple[bytes, str]:
+    pad, bar_h = _CARD_PAD, _CARD_BAR_H
+    img = _card_base(width, height).copy()
+    drw = ImageDraw.Draw(img)
+
+    f_val = _try_font(46)
+    f_small = _try_font(18)
+
+    bar_left = pad
+    bar_right = width - pad
+    bar_top = pad + 52
+    bar_bottom = bar_top + bar_h
+
     # Текущее значение
-    v = max(0, min(100, int(value)))
     vx = int(bar_left + (bar_right - bar_left) * (v / 100.0))
     drw.rectangle([(vx - 2, bar_top - 10), (vx + 2, bar_bottom + 10)], fill=(255, 255, 255))
     label, tip = classify_altseason(v)
 
     # Подписи и значение
     drw.text((pad, bar_bottom + 54), f"Статус: {label}", fill=(230, 230, 240), font=f_small)
-    drw.text((pad, bar_top - 48), "0", fill=(180, 180, 190), font=f_small)
-    drw.text((bar_right - 14, bar_top - 48), "100", fill=(180, 180, 190), font=f_small)
 
     val_text = f"{v}"
     vt_w, vt_h = _text_size(drw, val_text, f_val)
@@ -395,12 +645,21 @@ def render_altseason_card(value: int, width: int = 900, height: int = 220) -> Tu
     img.save(bio, format="PNG", optimize=True)
     return bio.getvalue(), f"altseason_{v}.png"
 
+async def render_altseason_card_async(value: int, width: int = 900, height: int = 220) -> Tuple[bytes, str]:
+    """render_altseason_card в пуле процессов (cpu_pool)."""
+    return await run_cpu(render_altseason_card, value, width, height)
+
 __all__ = [
     "fetch_altseason_index",
+    "fetch_altseason_index_async",
     "classify_altseason",
     "format_altseason_status",
     "format_altseason_text",
     "fetch_altseason_stats",
+    "fetch_altseason_stats_async",
+    "fetch_altseason_snapshot",
+    "fetch_altseason_snapshot_async",
     "format_altseason_stats",
     "render_altseason_card",
+    "render_altseason_card_async",
 ]
@@ -3,7 +3,9 @@
 """
 Универсальный парсер таблиц Investing (2025-стайл):
 
-- Стабильный HTTP с бэкоффом: cloudscraper -> requests (3 попытки)
+- Стабильный HTTP с бэкоффом: cloudscraper (пул сессий) -> requests (3 попытки)
+- HTML-бэкенд: lxml, если установлен (иначе html.parser); HTML_PARSER=... — принудительно.
+  В дерево попадают только <table> (SoupStrainer по срезу страницы между таблицами)
 - Умный выбор таблицы: ищет шапку Actual/Forecast/Previous и их синонимы (вкл. русские)
 - Парсит числа и единицы:
     %, K/Thousand/Ths/тыс., M/Mln/Million/млн., B/Bln/Billion/млрд., T/Trillion,
@@ -11,21 +13,59 @@
 - Терпит любые пробелы/NBSP, запятую/точку, юникодный минус
 - Доп. поля: release_dt_iso (если удаётся собрать из 1-2 столбцов), revised_from_*
 - Богатые понятные ошибки с тегами этапов: [NET]/[HTML]/[TABLE]/[HEAD]/[IDX]/[ROW]/[PARSE]
+- Повторные запросы условные (ETag/Last-Modified): на 304 страница не парсится заново
+- Если хост «лежит» (circuit breaker разомкнут) — сразу отдаём последние строки из кэша
+  с флагом row.stale = True
+- Разобранные строки и сжатый HTML дублируются в дисковый кэш (disk_cache.py):
+  после рестарта первые запросы обслуживаются с диска, а не из сети
 
 Публичные функции (совместимы):
-    fetch_table_rows(url, limit=12) -> (rows, err)
+    fetch_table_rows(url, limit=12, use_cache=True) -> (rows, err)   # rows: [ReleaseRow]
+    fetch_table_rows_async(url, limit=12, use_cache=True) -> (rows, err)   # для бота: не блокирует event loop
+    fetch_latest_row(url, use_cache=True) / fetch_latest_row_async(...) -> (row|None, err)
+        # только верхняя строка: разбор не идёт дальше первой строки данных
+    invalidate_rows_cache(url=None), rows_cache_stats()  # кэш строк с TTL по времени релиза
+    set_table_layouts(layouts), table_layouts()  # выученные раскладки таблиц (storage)
+    parse_cell_columns({name: cells}) / parse_cells(cells) -> (values float64, units int8)
+        # пакетный разбор ячеек (бэкфиллы, дашборды); коды единиц — UNIT_CODES / UNIT_NAMES
     format_table_for_tg(rows, src_url, max_rows=6) -> str
-    render_table_png(rows, title, max_rows=8) -> (png_bytes, filename)
+    render_table_png(rows, title, max_rows=8, theme="default") -> (png_bytes, filename)
+        # theme="fast" — без размытой тени и с быстрым сжатием PNG (TABLE_PNG_THEME)
+    render_table_png_async(...)  # то же в пуле процессов (cpu_pool.py), с кэшем готовых PNG
 """
 
+import asyncio
+import bisect
+import hashlib
 import io
+import json
 import os
 import re
 import time
-from typing import List, Tuple, Dict, Any, Optional
-from bs4 import BeautifulSoup
-
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from array import array
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from typing import List, Tuple, Dict, Any, Optional, Sequence
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+from PIL import Image, ImageDraw, ImageFilter
+
+import disk_cache
+from cache import SizedLRUCache, TTLCache
+from cpu_pool import run_cpu
+from fonts import get_font
+from storage import save_table_layout
+from http_client import (
+    SingleFlight, circuit_error, conditional_headers, fetch_text_async, forget_validators,
+    get_breaker, get_validators, host_failed, limited, note_throttled, remember_validators,
+    scraper_get,
+)
+
+# numpy — опционально (пакетный разбор отдаёт ndarray; без него — array из stdlib)
+try:
+    import numpy as _np
+except Exception:
+    _np = None
 
 # ===== TZ для release_dt_iso (опционально) =====
 _TZ_NAME = os.getenv("TZ", "Europe/Moscow")
@@ -36,51 +76,80 @@ except Exception:
     _tz = None
 
 # ================= HTTP =================
-def _get(url: str):
+_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/120 Safari/537.36"
+    ),
+    "Accept-Language": "en-US,en;q=0.9,ru-RU,ru;q=0.8",
+    "Cache-Control": "no-cache",
+    "Pragma": "no-cache",
+}
+
+def _get(url: str, conditional: bool = False):
     """
     Надёжный GET: 3 попытки с backoff, cloudscraper -> requests.
     Возврат: (status_code, text|None, err|None, debug_note)
+    conditional=True — If-None-Match/If-Modified-Since; 304 возвращается как (304, None, None, note).
+    Хост с разомкнутым circuit breaker — сразу (0, None, "[CIRCUIT] ...", note).
     """
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120 Safari/537.36"
-        ),
-        "Accept-Language": "en-US,en;q=0.9,ru-RU,ru;q=0.8",
-        "Cache-Control": "no-cache",
-        "Pragma": "no-cache",
-    }
+    breaker = get_breaker(url)
+    if not breaker.allow():
+        return 0, None, circuit_error(url), "circuit open"
+    attempts = 1 if breaker.half_open else 3   # пробный запрос — без ретраев
+    code, text, err, note, last_status = _get_attempts(url, conditional, attempts)
+    breaker.record(code in (200, 304) or not host_failed(last_status))
+    return code, text, err, note
+
+def _get_attempts(url: str, conditional: bool, attempts: int):
+    headers = conditional_headers(url, _HEADERS) if conditional else _HEADERS
+    breaker = get_breaker(url)
 
     last_err = None
+    last_status = 0
     notes = []
-    for attempt in range(3):
+    for attempt in range(attempts):
+        if attempt and breaker.is_open():
+            notes.append("circuit opened meanwhile")
+            break
         try:
             try:
-                import cloudscraper  # type: ignore
-                s = cloudscraper.create_scraper()
-                r = s.get(url, headers=headers, timeout=25)
+                r = scraper_get(url, headers=headers, timeout=25)
                 notes.append(f"try{attempt+1}: cloudscraper -> HTTP {r.status_code}")
+                last_status = r.status_code
+                if r.status_code == 304 and conditional:
+                    return r.status_code, None, None, "; ".join(notes), last_status
                 if r.status_code == 200 and r.text:
-                    return r.status_code, r.text, None, "; ".join(notes)
+                    remember_validators(url, r.headers)
+                    return r.status_code, r.text, None, "; ".join(notes), last_status
                 last_err = f"[NET] cloudscraper HTTP {r.status_code}"
             except Exception as e:
                 last_err = f"[NET] cloudscraper fail: {e}"
+                last_status = 0
                 notes.append(str(last_err))
 
             import requests
-            r = requests.get(url, headers=headers, timeout=25)
+            with limited(url):
+                r = requests.get(url, headers=headers, timeout=25)
+            note_throttled(url, r.status_code, r.headers)
             notes.append(f"try{attempt+1}: requests -> HTTP {r.status_code}")
+            last_status = r.status_code
+            if r.status_code == 304 and conditional:
+                return r.status_code, None, None, "; ".join(notes), last_status
             if r.status_code == 200 and r.text:
-                return r.status_code, r.text, None, "; ".join(notes)
+                remember_validators(url, r.headers)
+                return r.status_code, r.text, None, "; ".join(notes), last_status
             last_err = f"[NET] requests HTTP {r.status_code}"
         except Exception as e:
             last_err = f"[NET] requests fail: {e}"
+            last_status = 0
             notes.append(str(last_err))
 
-        time.sleep(0.6 * (2 ** attempt))  # 0.6, 1.2
+        if attempt < attempts - 1:
+            time.sleep(0.6 * (2 ** attempt))  # 0.6, 1.2
 
-    return 0, None, last_err or "[NET] network error", "; ".join(notes)
+    return 0, None, last_err or "[NET] network error", "; ".join(notes), last_status
 
 # ============== Units & numbers ==========
 # Нормируем к: percent / thousand / million / billion / trillion / None
@@ -120,12 +189,6 @@ _UNIT_TOKENS = {
     "trillion": ("trillion", 1_000_000_000_000.0),
 }
 
-# «Шум» рядом с числами
-_NOISE_TOKENS = {
-    "bbl", "barrel", "barrels", "jobs", "claims", "inventories", "units",
-    "mom", "qoq", "yoy", "mtm", "m/m", "y/y", "q/q"
-}
-
 # Заголовки
 _HEAD_ACTUAL_KEYS   = ["actual", "факт", "фактич"]
 _HEAD_FORECAST_KEYS = ["forecast", "прогноз", "estimate", "consensus", "est.", "exp.", "expectation"]
@@ -155,26 +218,27 @@ def _to_float(num_str: str, paren_neg: bool) -> Optional[float]:
     except Exception:
         return None
 
-def _extract_unit_token(text_lower: str) -> Optional[str]:
-    if "%" in text_lower:
-        return "%"
-    tokens = re.findall(r"[a-zа-я.%]+", text_lower)
-    for tok in tokens:
-        t = tok.strip(".").lower()
-        if t in _UNIT_TOKENS:
-            return t
-        if t in _NOISE_TOKENS:
-            continue
-    # прилипшие суффиксы после числа: "3.2M"
-    m = RE_NUM.search(text_lower)
+# ячейки без значения
+_EMPTY_CELLS = frozenset({"—", "-", "•", "", "n/a", "na", "—/—", "waiting", "pending"})
+_RE_WORD = re.compile(r"[a-zа-я.%]+")
+_RE_SUFFIX = re.compile(r"[a-zа-я.%]{1,7}")
+
+def _unit_of(low: str) -> Optional[Tuple[str, float]]:
+    """(unit, множитель) по тексту ячейки в нижнем регистре или None."""
+    if "%" in low:
+        return _UNIT_TOKENS["%"]
+    # первый словарный токен — единица; шум (jobs, mom, ...) и прочее пропускаем
+    for tok in _RE_WORD.findall(low):
+        unit = _UNIT_TOKENS.get(tok.strip("."))
+        if unit is not None:
+            return unit
+    # прилипший длинный суффикс после числа: "3.2millions" -> "million"
+    m = RE_NUM.search(low)
     if m:
-        end = m.end()
-        tail = text_lower[end:].strip().strip("()[]{}:;")
-        suf = re.match(r"^[a-zа-я.%]{1,7}", tail)
+        tail = low[m.end():].strip().strip("()[]{}:;")
+        suf = _RE_SUFFIX.match(tail)
         if suf:
-            t = suf.group(0).strip(".").lower()
-            if t in _UNIT_TOKENS:
-                return t
+            return _UNIT_TOKENS.get(suf.group(0).strip("."))
     return None
 
 def _to_scalar(txt: str):
@@ -184,26 +248,71 @@ def _to_scalar(txt: str):
     """
     if not txt:
         return None, None
-    raw = _normalize_spaces(str(txt))
-    if raw.lower() in {"—", "-", "•", "", "n/a", "na", "—/—", "waiting", "pending"}:
+    return _scalar_of(str(txt))
+
+@lru_cache(maxsize=4096)
+def _scalar_of(txt: str) -> Tuple[Optional[float], Optional[str]]:
+    # ячейки повторяются (previous строки = actual следующей, одни и те же значения на
+    # соседних страницах) — разбор один раз на строку, дальше попадание в lru
+    raw = _normalize_spaces(txt)
+    low = raw.lower()
+    if low in _EMPTY_CELLS:
         return None, None
 
     m = RE_NUM.search(raw)
     if not m:
         return None, None
 
-    paren_neg = raw.strip().startswith("(") and raw.strip().endswith(")")
+    paren_neg = raw.startswith("(") and raw.endswith(")")
     num = _to_float(m.group(1), paren_neg)
     if num is None:
         return None, None
 
-    unit_token = _extract_unit_token(raw.lower())
-    if unit_token and unit_token in _UNIT_TOKENS:
-        norm_name, mul = _UNIT_TOKENS[unit_token]
+    unit = _unit_of(low)
+    if unit is not None:
+        norm_name, mul = unit
         return num * mul, norm_name
-
     return num, None
 
+# ============== Batch conversion ==============
+# коды единиц для пакетного разбора (int8); 0 — без единицы / нет значения
+UNIT_CODES = {None: 0, "percent": 1, "thousand": 2, "million": 3, "billion": 4, "trillion": 5}
+UNIT_NAMES = tuple(UNIT_CODES)   # код -> имя
+
+def parse_cell_columns(columns: Dict[str, Sequence[str]]) -> Dict[str, tuple]:
+    """
+    Пакетный разбор колонок сырых ячеек: {name: [cell, ...]} -> {name: (values, units)}.
+    values — float64 (NaN, где значения нет), units — int8-коды UNIT_CODES.
+    С numpy — ndarray, без него — array('d') / array('b').
+    Одинаковые строки (во всех колонках сразу) разбираются один раз и раскладываются по индексам.
+    """
+    uniq: Dict[str, int] = {}
+    positions = {name: [uniq.setdefault(c or "", len(uniq)) for c in cells]
+                 for name, cells in columns.items()}
+
+    nan = float("nan")
+    u_vals, u_units = [], []
+    for cell in uniq:
+        v, u = _to_scalar(cell)
+        u_vals.append(nan if v is None else v)
+        u_units.append(UNIT_CODES.get(u, 0))
+
+    out: Dict[str, tuple] = {}
+    if _np is not None:
+        vals_arr = _np.asarray(u_vals, dtype=_np.float64)
+        units_arr = _np.asarray(u_units, dtype=_np.int8)
+        for name, pos in positions.items():
+            idx = _np.asarray(pos, dtype=_np.intp)
+            out[name] = (vals_arr[idx], units_arr[idx])
+    else:
+        for name, pos in positions.items():
+            out[name] = (array("d", [u_vals[i] for i in pos]), array("b", [u_units[i] for i in pos]))
+    return out
+
+def parse_cells(cells: Sequence[str]) -> tuple:
+    """Одна колонка: [cell, ...] -> (values float64, units int8)."""
+    return parse_cell_columns({"_": cells})["_"]
+
 def _parse_revised(text: str):
     """
     Возвращает (val, unit) если встречено 'revised from ...', иначе (None, None)
@@ -225,6 +334,53 @@ def _idx_for(heads: List[str], keys: List[str], default: int) -> int:
             return i
     return default
 
+# ============== HTML backend ==========
+def _pick_html_parser() -> str:
+    """
+    Бэкенд BeautifulSoup: HTML_PARSER из окружения, иначе lxml (C, в разы быстрее),
+    иначе встроенный html.parser. Выбирается один раз при импорте.
+    """
+    forced = os.getenv("HTML_PARSER", "").strip()
+    for name in ([forced] if forced else []) + ["lxml", "html.parser"]:
+        try:
+            BeautifulSoup("<table><tr><td></td></tr></table>", name)
+            return name
+        except FeatureNotFound:
+            continue
+    return "html.parser"
+
+HTML_PARSER = _pick_html_parser()
+
+# строим дерево только из <table>: скрипты, меню и реклама в него не попадают
+_ONLY_TABLES = SoupStrainer("table")
+# <table> внутри <script>/<style>/комментариев — не таблица (var x = '<table>...')
+_RE_RAW_BLOCK = re.compile(r"<(script|style)\b.*?</\1\s*>|<!--.*?-->", re.S | re.I)
+_RE_TABLE_TAG = re.compile(r"<(/?)table\b", re.I)
+
+def _tables_slice(html: str) -> str:
+    """Кусок страницы от первого <table до последнего </table> (или вся страница)."""
+    raw = [m.span() for m in _RE_RAW_BLOCK.finditer(html)]
+    raw_starts = [a for a, _ in raw]
+
+    def in_raw(pos: int) -> bool:
+        i = bisect.bisect_right(raw_starts, pos) - 1
+        return i >= 0 and pos < raw[i][1]
+
+    first = last = None
+    for m in _RE_TABLE_TAG.finditer(html):
+        if in_raw(m.start()):
+            continue
+        if m.group(1):
+            last = html.find(">", m.end())
+        elif first is None:
+            first = m.start()
+    if first is None or last is None or last < first:
+        return html
+    return html[first:last + 1]
+
+def _table_soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(_tables_slice(html), HTML_PARSER, parse_only=_ONLY_TABLES)
+
 # ============== Table detection & diagnostics ==========
 def _score_heads(heads: List[str]) -> int:
     line = " ".join(heads)
@@ -270,6 +426,43 @@ def _pick_target_table(soup: BeautifulSoup):
     diag["picked"] = {"heads": heads, "score": 0, "fallback": "last_table"}
     return tb, heads, diag
 
+# ============== Learned layout ==========
+# url -> где таблица и какие колонки сработали в прошлый раз; отпечаток — id/class/шапка
+_LAYOUTS: Dict[str, Dict[str, Any]] = {}
+
+def _table_heads(tb) -> List[str]:
+    return [th.get_text(" ", strip=True).lower() for th in tb.select("thead th")]
+
+def _layout_of(tables: list, tb, heads: List[str], idx: Tuple[int, int, int]) -> Dict[str, Any]:
+    pos = next((i for i, t in enumerate(tables) if t is tb), -1)
+    return {
+        "pos": pos,
+        "id": tb.get("id"),
+        "cls": " ".join(tb.get("class") or []),
+        "heads": list(heads),
+        "idx": list(idx),
+    }
+
+def _table_by_layout(tables: list, layout: Dict[str, Any]):
+    """Таблица по выученной раскладке или None, если отпечаток не совпал."""
+    if layout.get("id"):
+        tb = next((t for t in tables if t.get("id") == layout["id"]), None)
+    else:
+        pos = layout.get("pos", -1)
+        tb = tables[pos] if isinstance(pos, int) and 0 <= pos < len(tables) else None
+    if tb is None or " ".join(tb.get("class") or []) != (layout.get("cls") or ""):
+        return None
+    if _table_heads(tb) != layout.get("heads"):
+        return None
+    return tb
+
+def set_table_layouts(layouts: Dict[str, Dict[str, Any]]):
+    """Загрузить раскладки, сохранённые в storage (при старте бота)."""
+    _LAYOUTS.update(layouts or {})
+
+def table_layouts() -> Dict[str, Dict[str, Any]]:
+    return dict(_LAYOUTS)
+
 # ============== DateTime helper ==========
 _MONTHS = {
     "jan":1,"feb":2,"mar":3,"apr":4,"may":5,"jun":6,"jul":7,"aug":8,"sep":9,"oct":10,"nov":11,"dec":12,
@@ -295,6 +488,13 @@ def _to_iso(date_text: str, time_text: str) -> Optional[str]:
             month = _MONTHS.get(mon_txt)
             year = int(m.group(3)); 
             if year < 100: year += 2000
+        else:
+            # англ. Investing: "Oct 16, 2025"
+            m = re.match(r"^([A-Za-z\.]{3,})\s+(\d{1,2}),?\s+(\d{2,4})", d)
+            if m:
+                month = _MONTHS.get(m.group(1).strip(".").lower()[:3])
+                day, year = int(m.group(2)), int(m.group(3))
+                if year < 100: year += 2000
 
     if not (day and month and year):
         return None
@@ -311,27 +511,289 @@ def _to_iso(date_text: str, time_text: str) -> Optional[str]:
         pass
     return None
 
-# ============== Public API ==============
-def fetch_table_rows(url: str, limit: int = 12) -> Tuple[list, Optional[str]]:
+# ============== Row type ==============
+_OPTIONAL_KEYS = frozenset({"revised_from_val", "revised_from_unit", "release_dt_iso", "stale"})
+
+@dataclass(slots=True)
+class ReleaseRow:
     """
-    Возвращает (rows, err).
-    rows: [{date,time,actual,forecast,previous, actual_val,actual_unit,..., release_dt_iso?, revised_from_*?}]
+    Строка таблицы релизов. Поля — как ключи прежнего dict; для правил из indicators.py
+    и старого кода есть dict-доступ: row.get("actual_val"), row["date"], "release_dt_iso" in row.
+    Необязательные поля (revised_from_*, release_dt_iso, stale) «отсутствуют», пока пусты.
     """
-    code, html, net_err, net_note = _get(url)
+    date: str
+    time: str
+    actual: str
+    forecast: str
+    previous: str
+    actual_val: Optional[float] = None
+    actual_unit: Optional[str] = None
+    forecast_val: Optional[float] = None
+    forecast_unit: Optional[str] = None
+    previous_val: Optional[float] = None
+    previous_unit: Optional[str] = None
+    revised_from_val: Optional[float] = None
+    revised_from_unit: Optional[str] = None
+    release_dt_iso: Optional[str] = None
+    stale: bool = False
+
+    def __contains__(self, key) -> bool:
+        if key in _OPTIONAL_KEYS:
+            if key == "stale":
+                return self.stale
+            if key == "revised_from_unit":
+                # как в прежнем dict: пара ключей есть, если есть само значение (unit бывает None)
+                key = "revised_from_val"
+            return getattr(self, key) is not None
+        return key in _ROW_FIELDS
+
+    def __getitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Прежний dict-формат строки (пустые необязательные поля опущены)."""
+        return {k: getattr(self, k) for k in _ROW_FIELDS if k in self}
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "ReleaseRow":
+        return cls(**{k: d[k] for k in _ROW_FIELDS if k in d})
+
+_ROW_FIELDS = tuple(f.name for f in fields(ReleaseRow))
+
+# ============== Rows cache ==============
+# Таблица меняется только в момент релиза: около релиза держим коротко, иначе — долго
+ROWS_TTL_SHORT = 15               # сек, окно релиза / ждём факт
+ROWS_TTL_WAITING = 60             # сек, факт ещё не вышел, а время релиза неизвестно
+ROWS_TTL_LONG = 15 * 60           # сек, до следующего релиза далеко
+RELEASE_WINDOW_BEFORE = 2 * 60    # сек до релиза, когда начинаем держать коротко
+RELEASE_WINDOW_AFTER = 15 * 60    # сек после релиза (ревизии, запоздавший факт)
+
+_ROWS_CACHE = TTLCache(maxsize=256)   # url -> (rows, limit)
+
+def _release_ts(row: Dict[str, Any]) -> Optional[float]:
+    iso = row.get("release_dt_iso")
+    if not iso:
+        return None
+    try:
+        import datetime as _dt
+        return _dt.datetime.fromisoformat(iso).timestamp()
+    except Exception:
+        return None
+
+def _rows_ttl(rows: list, now: Optional[float] = None) -> float:
+    """TTL записи кэша по ближайшему release_dt_iso строк таблицы."""
+    now = time.time() if now is None else now
+    stamps = [ts for ts in (_release_ts(r) for r in rows) if ts is not None]
+    if any(now - RELEASE_WINDOW_AFTER <= ts <= now + RELEASE_WINDOW_BEFORE for ts in stamps):
+        return ROWS_TTL_SHORT
+
+    top = rows[0] if rows else None
+    if top is not None and top.get("actual_val") is None:
+        top_ts = _release_ts(top)
+        if top_ts is None:
+            return ROWS_TTL_WAITING
+        if top_ts <= now:
+            return ROWS_TTL_SHORT       # время вышло, а факта нет — ждём
+
+    upcoming = [ts for ts in stamps if ts > now]
+    if upcoming:
+        until = min(upcoming) - RELEASE_WINDOW_BEFORE - now
+        return max(ROWS_TTL_SHORT, min(ROWS_TTL_LONG, until))
+    return ROWS_TTL_LONG
+
+def _cached_rows(url: str, limit: int) -> Optional[list]:
+    hit = _ROWS_CACHE.get(url)
+    if hit is None:
+        return None
+    rows, cached_limit = hit
+    if cached_limit < limit and len(rows) >= cached_limit:
+        return None   # в кэше обрезанная таблица, а нужно больше строк
+    return rows[:limit]
+
+def _store_rows(url: str, rows: list, limit: int) -> tuple:
+    """
+    Положить строки в кэш. Короткий свежий разбор (fetch_latest_row) с той же верхней
+    строкой не затирает полную таблицу — ей лишь продлевается срок. Возврат: (rows, limit) в кэше.
+    """
+    prev = _ROWS_CACHE.peek(url)
+    if prev is not None and limit < prev[1] and rows and prev[0] and rows[0] == prev[0][0]:
+        rows, limit = prev
+    _ROWS_CACHE.set(url, (rows, limit), _rows_ttl(rows))
+    return rows, limit
+
+def _revalidatable_rows(url: str, limit: int) -> Optional[tuple]:
+    """(rows, limit) прошлого разбора (даже протухшие), если их хватит для ответа на 304."""
+    entry = _ROWS_CACHE.peek(url)
+    if entry is None:
+        return None
+    rows, cached_limit = entry
+    if cached_limit < limit and len(rows) >= cached_limit:
+        return None
+    return entry
+
+def _stale_rows(url: str, limit: int) -> list:
+    """Последние разобранные строки (копии с флагом stale=True) — когда сайт недоступен."""
+    entry = _ROWS_CACHE.peek(url)
+    if entry is None:
+        return []
+    return [replace(r, stale=True) for r in entry[0][:limit]]
+
+def _finish_fetch(url: str, limit: int, code: int, html: Optional[str], net_err, net_note,
+                  stale: Optional[tuple], parsed: Optional[tuple] = None) -> Tuple[list, Optional[str]]:
+    # parsed — готовый результат _parse_rows (посчитан в пуле процессов), иначе парсим здесь
+    if code == 304 and stale is not None:
+        # страница не менялась — не парсим, продлеваем прошлый результат
+        rows, cached_limit = stale
+        _store_rows(url, rows, cached_limit)
+        disk_cache.touch(url, _rows_ttl(rows))
+        return rows[:limit], None
     if code != 200 or not html:
+        if net_err and net_err.startswith("[CIRCUIT]"):
+            stale_rows = _stale_rows(url, limit)
+            if stale_rows:
+                return stale_rows, None
         return [], f"{net_err or '[NET] HTTP error'} | note: {net_note}"
+    hint = _LAYOUTS.get(url)
+    rows, err, layout = parsed if parsed is not None else _parse_rows(html, limit, hint)
+    if err:
+        forget_validators(url)   # валидаторы без распарсенных строк бесполезны
+    else:
+        if layout != hint:
+            _LAYOUTS[url] = layout
+        kept_rows, kept_limit = _store_rows(url, rows, limit)
+        etag, last_modified = get_validators(url)
+        disk_cache.put(url, html, {"rows": [r.to_dict() for r in kept_rows], "limit": kept_limit},
+                       _rows_ttl(kept_rows), etag, last_modified)
+    return rows, err
+
+def _disk_warm(url: str):
+    """После рестарта: поднять прошлый разбор и валидаторы из дискового кэша в память."""
+    if _ROWS_CACHE.peek(url) is not None:
+        return
+    entry = disk_cache.get(url, allow_stale=True)
+    parsed = entry and entry.get("parsed")
+    if not isinstance(parsed, dict) or not parsed.get("rows"):
+        return
+    # протухшая запись годится для 304 и как «последние известные данные»
+    ttl = max(0.0, (entry.get("expires_at") or 0) - time.time())
+    try:
+        rows = [ReleaseRow.from_dict(d) for d in parsed["rows"]]
+    except TypeError:
+        return   # запись старого/чужого формата
+    _ROWS_CACHE.set(url, (rows, int(parsed.get("limit") or len(rows))), ttl)
+    if get_validators(url) == (None, None):
+        remember_validators(url, {"ETag": entry.get("etag"), "Last-Modified": entry.get("last_modified")})
+
+def invalidate_rows_cache(url: Optional[str] = None):
+    """Сбросить кэш строк для url (или целиком), в памяти и на диске."""
+    _ROWS_CACHE.invalidate(url)
+    disk_cache.invalidate(url)
+
+def rows_cache_stats() -> Dict[str, int]:
+    return _ROWS_CACHE.stats()
+
+# ============== Public API ==============
+def fetch_table_rows(url: str, limit: int = 12, use_cache: bool = True) -> Tuple[list, Optional[str]]:
+    """
+    Возвращает (rows, err).
+    rows: [ReleaseRow(date,time,actual,forecast,previous, actual_val,actual_unit,..., release_dt_iso?, revised_from_*?)]
+          (dict-совместимы: row.get("actual_val"); row.to_dict() — прежний dict)
+    use_cache=False — всегда идти в сеть (свежий результат всё равно попадёт в кэш).
+    """
+    if use_cache:
+        cached = _cached_rows(url, limit)
+        if cached is not None:
+            return cached, None
+        _disk_warm(url)
+        cached = _cached_rows(url, limit)
+        if cached is not None:
+            return cached, None
+    else:
+        _disk_warm(url)
+    stale = _revalidatable_rows(url, limit)
+    code, html, net_err, net_note = _get(url, conditional=stale is not None)
+    return _finish_fetch(url, limit, code, html, net_err, net_note, stale)
+
+def fetch_latest_row(url: str, use_cache: bool = True) -> Tuple[Optional[ReleaseRow], Optional[str]]:
+    """(верхняя строка таблицы | None, err) — разбор останавливается на первой строке данных."""
+    rows, err = fetch_table_rows(url, limit=1, use_cache=use_cache)
+    return (rows[0] if rows else None), err
+
+# одновременные запросы одной страницы делят один fetch+parse
+_FLIGHTS = SingleFlight()
+
+async def fetch_table_rows_async(url: str, limit: int = 12, use_cache: bool = True) -> Tuple[list, Optional[str]]:
+    """
+    То же, что fetch_table_rows, но сеть не блокирует event loop:
+    общий пул aiohttp, бэкофф через asyncio.sleep, cloudscraper — в потоке.
+    Конкурентные вызовы с тем же url (и limit) ждут один запрос и получают общие rows.
+    """
+    if use_cache:
+        cached = _cached_rows(url, limit)
+        if cached is not None:
+            return cached, None
+    return await _FLIGHTS.do((url, limit), lambda: _fetch_table_rows_async(url, limit, use_cache))
+
+async def fetch_latest_row_async(url: str, use_cache: bool = True
+                                 ) -> Tuple[Optional[ReleaseRow], Optional[str]]:
+    """Асинхронный fetch_latest_row — для частого опроса в боте."""
+    rows, err = await fetch_table_rows_async(url, limit=1, use_cache=use_cache)
+    return (rows[0] if rows else None), err
+
+async def _fetch_table_rows_async(url: str, limit: int, use_cache: bool = True) -> Tuple[list, Optional[str]]:
+    # sqlite — в потоке, разбор — в пуле процессов, чтобы не держать event loop
+    await asyncio.to_thread(_disk_warm, url)
+    if use_cache:
+        cached = _cached_rows(url, limit)
+        if cached is not None:
+            return cached, None
+    stale = _revalidatable_rows(url, limit)
+    code, html, net_err, net_note = await fetch_text_async(
+        url, headers=_HEADERS, timeout=25, conditional=stale is not None
+    )
+    layout = _LAYOUTS.get(url)
+    parsed = None
+    if code == 200 and html:
+        # BeautifulSoup — в отдельном процессе: релизы нескольких индикаторов парсятся параллельно
+        parsed = await run_cpu(_parse_rows, html, limit, layout)
+    result = await asyncio.to_thread(_finish_fetch, url, limit, code, html, net_err, net_note,
+                                     stale, parsed)
+    if _LAYOUTS.get(url) != layout:
+        try:
+            await save_table_layout(url, _LAYOUTS[url])
+        except Exception:
+            pass   # раскладка — лишь подсказка, в следующий раз выучим заново
+    return result
 
+def _parse_rows(html: str, limit: int, layout: Optional[Dict[str, Any]] = None
+                ) -> Tuple[list, Optional[str], Optional[Dict[str, Any]]]:
+    """
+    (rows, err, layout). layout — раскладка прошлого удачного разбора: если отпечаток
+    таблицы совпал, скоринг всех таблиц пропускается. Возвращается раскладка,
+    по которой строки реально разобраны (None при ошибке).
+    """
     try:
-        soup = BeautifulSoup(html, "html.parser")
+        soup = _table_soup(html)
     except Exception as e:
-        return [], f"[HTML] soup fail: {e}"
+        return [], f"[HTML] soup fail ({HTML_PARSER}): {e}", None
+
+    if layout:
+        tables = soup.select("table")
+        target = _table_by_layout(tables, layout)
+        if target is not None:
+            idx = tuple(layout["idx"])
+            rows, _ = _extract_rows(target, idx, limit)
+            if rows:
+                return rows, None, layout
 
     target, heads_for_log, diag = _pick_target_table(soup)
     if target is None:
-        return [], f"[TABLE] not found | diag: {diag}"
-
-    rows = []
-    bad_rows = 0
+        return [], f"[TABLE] not found | diag: {diag}", None
 
     # индексы колонок
     heads = heads_for_log or []
@@ -343,6 +805,18 @@ def fetch_table_rows(url: str, limit: int = 12) -> Tuple[list, Optional[str]]:
     idx_diag = {"idx_actual": idx_actual, "idx_forecast": idx_forecast, "idx_previous": idx_previous}
     diag["col_indexing"] = idx_diag
 
+    idx = (idx_actual, idx_forecast, idx_previous)
+    rows, bad_rows = _extract_rows(target, idx, limit)
+    if not rows:
+        return [], f"[ROW] no rows parsed | diag: {diag} | bad_rows: {bad_rows}", None
+
+    return rows, None, _layout_of(soup.select("table"), target, heads, idx)
+
+def _extract_rows(target, idx: Tuple[int, int, int], limit: int) -> Tuple[list, int]:
+    idx_actual, idx_forecast, idx_previous = idx
+    rows = []
+    bad_rows = 0
+
     for tr in target.select("tbody tr"):
         tds = tr.select("td")
         if len(tds) < 5:
@@ -370,31 +844,24 @@ def fetch_table_rows(url: str, limit: int = 12) -> Tuple[list, Optional[str]]:
         # revised from …
         rev_v, rev_u = _parse_revised(actual_text)
 
-        row: Dict[str, Any] = {
-            "date": _clean(date_text),
-            "time": _clean(time_text),
-            "actual": _clean(actual_text),
-            "forecast": _clean(forecast_text),
-            "previous": _clean(previous_text),
-            "actual_val": act_v, "actual_unit": act_u,
-            "forecast_val": fc_v, "forecast_unit": fc_u,
-            "previous_val": pr_v, "previous_unit": pr_u,
-        }
-
-        if rev_v is not None:
-            row["revised_from_val"] = rev_v
-            row["revised_from_unit"] = rev_u
-
-        iso = _to_iso(row["date"], row["time"])
-        if iso:
-            row["release_dt_iso"] = iso
-
-        rows.append(row)
-
-    if not rows:
-        return [], f"[ROW] no rows parsed | diag: {diag} | bad_rows: {bad_rows}"
-
-    return rows[:limit], None
+        date, tm = _clean(date_text), _clean(time_text)
+        rows.append(ReleaseRow(
+            date=date,
+            time=tm,
+            actual=_clean(actual_text),
+            forecast=_clean(forecast_text),
+            previous=_clean(previous_text),
+            actual_val=act_v, actual_unit=act_u,
+            forecast_val=fc_v, forecast_unit=fc_u,
+            previous_val=pr_v, previous_unit=pr_u,
+            revised_from_val=rev_v,
+            revised_from_unit=rev_u if rev_v is not None else None,
+            release_dt_iso=_to_iso(date, tm) or None,
+        ))
+        if len(rows) >= limit:
+            break   # остальные строки не нужны — не тратим на них _to_scalar/_to_iso
+
+    return rows, bad_rows
 
 # ============== Formatting (text) ==============
 def _fmt_val(v, u):
@@ -477,23 +944,8 @@ def format_table_for_tg(rows, src_url: str, max_rows: int = 6) -> str:
 
 # ============== PNG (modern 2025 look) ==============
 def _load_font_candidates(size, bold=False, mono=False):
-    # Моно для чисел, Sans для остального
-    mono_paths = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
-        "C:/Windows/Fonts/consola.ttf",
-        "C:/Windows/Fonts/lucon.ttf",
-    ]
-    sans_paths = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf" if bold else "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "C:/Windows/Fonts/arialbd.ttf" if bold else "C:/Windows/Fonts/arial.ttf",
-    ]
-    paths = mono_paths if mono else sans_paths
-    for p in paths:
-        try:
-            return ImageFont.truetype(p, size=size)
-        except Exception:
-            continue
-    return ImageFont.load_default()
+    # Моно для чисел, Sans для остального; файлы ищутся и грузятся один раз (fonts.py)
+    return get_font("sans", size, bold=bold, mono=mono)
 
 def _text_size(draw, text, font):
     x0, y0, x1, y1 = draw.textbbox((0, 0), str(text), font=font)
@@ -529,7 +981,39 @@ def _auto_col_widths(rows, headers, draw, f_head, f_cell):
         widths[i] += 10
     return widths
 
-def render_table_png(rows, title: str, max_rows: int = 8):
+# Темы: "default" — с мягкой размытой тенью и максимальным сжатием PNG,
+# "fast" — без тени и с быстрым сжатием (для массовых рассылок)
+TABLE_THEME = os.getenv("TABLE_PNG_THEME", "default")
+
+_TABLE_BG = (246, 248, 252)       # общий фон
+_TABLE_SHADOW = (0, 0, 0, 46)     # мягкая тень
+
+@lru_cache(maxsize=16)
+def _table_backdrop(width: int, height: int, card_rect: Tuple[int, int, int, int],
+                    radius: int, shadow: bool) -> Image.Image:
+    """Фон с размытой тенью под карточкой — зависит только от размеров, считаем один раз."""
+    base = Image.new("RGBA", (width, height), _TABLE_BG)
+    if shadow:
+        layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        ImageDraw.Draw(layer).rounded_rectangle(list(card_rect), radius=radius, fill=_TABLE_SHADOW)
+        base.alpha_composite(layer.filter(ImageFilter.GaussianBlur(radius=12)))
+    return base
+
+@lru_cache(maxsize=16)
+def _header_gradient(width: int, height: int, left: tuple, right: tuple) -> Image.Image:
+    """Горизонтальный градиент шапки: одна строка пикселей, растянутая по высоте."""
+    row = bytearray()
+    for i in range(width):
+        t = i / max(1, width - 1)
+        row += bytes((
+            int(left[0]*(1-t) + right[0]*t),
+            int(left[1]*(1-t) + right[1]*t),
+            int(left[2]*(1-t) + right[2]*t),
+            255,
+        ))
+    return Image.frombytes("RGBA", (width, 1), bytes(row)).resize((width, height), Image.NEAREST)
+
+def render_table_png(rows, title: str, max_rows: int = 8, theme: str = "default"):
     headers = ["RELEASE DATE", "TIME", "ACTUAL", "FORECAST", "PREVIOUS"]  # капс для чистоты сетки
 
     # Собираем видимые ряды
@@ -547,9 +1031,8 @@ def render_table_png(rows, title: str, max_rows: int = 8):
         tbl = [["—","—","—","—","—"]]
 
     # Цвета (светлая премиум-палитра)
-    BG         = (246, 248, 252)     # общий фон
+    BG         = _TABLE_BG           # общий фон
     CARD       = (255, 255, 255, 255)# карточка
-    SHADOW     = (0, 0, 0, 46)       # мягкая тень
     GRID       = (225, 230, 238, 255)# линии сетки
     BORDER     = (214, 221, 232, 255)# рамка карточки
     HEAD_L     = (244, 248, 255, 255)# градиент шапки слева
@@ -591,16 +1074,9 @@ def render_table_png(rows, title: str, max_rows: int = 8):
     width  = PAD*2 + table_w
     height = PAD*2 + TITLE_H + SUB_H + GAP + HEAD_H + len(tbl)*ROW_H + GAP + FOOT_H
 
-    # Фон
-    base = Image.new("RGBA", (width, height), BG)
-
-    # Тень под карточкой (мягкая, без смаза линий)
-    shadow = Image.new("RGBA", (width, height), (0,0,0,0))
-    sd = ImageDraw.Draw(shadow)
+    # Фон + тень под карточкой (мягкая, без смаза линий); в теме "fast" — без тени
     card_rect = [PAD-2, PAD-2 + TITLE_H + SUB_H, width-PAD+2, height-PAD-8]
-    sd.rounded_rectangle(card_rect, radius=RADIUS+6, fill=SHADOW)
-    shadow = shadow.filter(ImageFilter.GaussianBlur(radius=12))
-    base.alpha_composite(shadow)
+    base = _table_backdrop(width, height, tuple(card_rect), RADIUS+6, theme != "fast").copy()
 
     # Карточка-основание
     card = Image.new("RGBA", (width, height), (0,0,0,0))
@@ -621,15 +1097,7 @@ def render_table_png(rows, title: str, max_rows: int = 8):
     y0 = PAD + TITLE_H + SUB_H + GAP
     head_rect = [x0, y0, x0 + table_w, y0 + HEAD_H]
 
-    grad = Image.new("RGBA", (table_w, HEAD_H), (0,0,0,0))
-    gd = ImageDraw.Draw(grad)
-    for i in range(table_w):
-        t = i / max(1, table_w - 1)
-        r = int(HEAD_L[0]*(1-t) + HEAD_R[0]*t)
-        g = int(HEAD_L[1]*(1-t) + HEAD_R[1]*t)
-        b = int(HEAD_L[2]*(1-t) + HEAD_R[2]*t)
-        gd.line([(i,0),(i,HEAD_H)], fill=(r,g,b,255))
-    card.alpha_composite(grad, dest=(x0, y0))
+    card.alpha_composite(_header_gradient(table_w, HEAD_H, HEAD_L, HEAD_R), dest=(x0, y0))
 
     # «Чипы» под заголовки — лёгкие плашки для современного вида
     cx = x0
@@ -705,6 +1173,52 @@ def render_table_png(rows, title: str, max_rows: int = 8):
     out.paste(base, mask=base.split()[-1])
 
     buf = io.BytesIO()
-    out.save(buf, format="PNG", optimize=True)
+    if theme == "fast":
+        out.save(buf, format="PNG", compress_level=1)
+    else:
+        out.save(buf, format="PNG", optimize=True)
     buf.seek(0)
     return buf.getvalue(), "indicator_table.png"
+
+# ============== Render cache ==============
+# готовые PNG по содержимому: рассылка одного релиза по всем чатам рисуется один раз
+RENDER_CACHE_ITEMS = int(os.getenv("RENDER_CACHE_ITEMS", "128"))
+RENDER_CACHE_MB = float(os.getenv("RENDER_CACHE_MB", "16"))
+_RENDER_CACHE = SizedLRUCache(RENDER_CACHE_ITEMS, int(RENDER_CACHE_MB * 1024 * 1024))
+_RENDER_FLIGHTS = SingleFlight()
+
+def _render_key(rows, title: str, max_rows: int, theme: str = "default") -> str:
+    """Хэш всего, от чего зависит картинка: видимые ячейки и первые 12 строк (ширины колонок)."""
+    cells = [
+        (
+            r.get("date", "") or "—",
+            r.get("time", "") or "—",
+            _fmt_val(r.get("actual_val"),   r.get("actual_unit")),
+            _fmt_val(r.get("forecast_val"), r.get("forecast_unit")),
+            _fmt_val(r.get("previous_val"), r.get("previous_unit")),
+        )
+        for r in (rows or [])[:max(12, max_rows)]
+    ]
+    raw = json.dumps([title, max_rows, theme, cells], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+async def render_table_png_async(rows, title: str, max_rows: int = 8, theme: Optional[str] = None):
+    """
+    render_table_png в пуле процессов (cpu_pool) — отрисовка не держит event loop.
+    Результат кэшируется по содержимому (render_cache_stats()); одинаковые
+    конкурентные вызовы ждут одну отрисовку.
+    """
+    theme = theme or TABLE_THEME
+    key = _render_key(rows, title, max_rows, theme)
+    hit = _RENDER_CACHE.get(key)
+    if hit is not None:
+        return hit
+    return await _RENDER_FLIGHTS.do(key, lambda: _render_and_store(key, rows, title, max_rows, theme))
+
+async def _render_and_store(key: str, rows, title: str, max_rows: int, theme: str):
+    png = await run_cpu(render_table_png, rows, title, max_rows, theme)
+    _RENDER_CACHE.set(key, png, len(png[0]))
+    return png
+
+def render_cache_stats() -> Dict[str, int]:
+    return _RENDER_CACHE.stats()
@@ -3,6 +3,7 @@
 import aiosqlite
 import os
 import hashlib
+import json
 
 DB_PATH = os.getenv("DB_PATH", "jobless.db")
 
@@ -20,6 +21,11 @@ async def init_db():
             UNIQUE(chat_id, key),
             UNIQUE(chat_id, title)
         )""")
+        await conn.execute("""
+        CREATE TABLE IF NOT EXISTS table_layouts(
+            url TEXT PRIMARY KEY,
+            layout TEXT        -- JSON: где на странице таблица и индексы колонок
+        )""")
         await conn.commit()
 
 # ----- подписки -----
@@ -45,6 +51,26 @@ async def get_state(key: str):
         row = await cur.fetchone()
         return row[0] if row else None
 
+# ----- выученные раскладки таблиц Investing -----
+async def save_table_layout(url: str, layout: dict):
+    async with aiosqlite.connect(DB_PATH) as conn:
+        await conn.execute(
+            "INSERT OR REPLACE INTO table_layouts(url, layout) VALUES(?,?)",
+            (url, json.dumps(layout, ensure_ascii=False)),
+        )
+        await conn.commit()
+
+async def load_table_layouts() -> dict:
+    async with aiosqlite.connect(DB_PATH) as conn:
+        cur = await conn.execute("SELECT url, layout FROM table_layouts")
+        out = {}
+        for url, raw in await cur.fetchall():
+            try:
+                out[url] = json.loads(raw)
+            except Exception:
+                pass
+        return out
+
 # ----- кастомные индикаторы (пер-чат) -----
 def _make_key(chat_id: int, title: str) -> str:
     raw = f"{chat_id}:{title}".encode("utf-8")
@@ -0,0 +1,134 @@
+# bench_altseason_index.py
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк и паритет извлечения индекса альтсезона (_extract_index_from_soup).
+
+_baseline_index — замороженная копия прежнего алгоритма (якоря по одному regex на слово,
+ближайший якорь — min() по всем). Скрипт:
+  1) сверяет ответы прежнего и текущего алгоритма на случайных страницах
+  2) меряет get_text, поиск по тексту прежним и текущим способом и весь вызов
+     на маленькой странице и на синтетической странице в 20k токенов
+
+Обе версии берут текст всей страницы через get_text — его стоимость печатается отдельно.
+
+    python tests/bench_altseason_index.py [--pages 3000] [--repeat 5] [page.html ...]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import parser_altseason as alt  # noqa: E402
+
+def _baseline_index(text: str) -> int:
+    """Прежний алгоритм по уже извлечённому тексту страницы."""
+    m = re.search(r"(Altcoin\s+Season\s+Index|Индекс\s+сезона\s+альткоинов)[^\d]{0,40}(\d{1,3})", text, re.I)
+    if m:
+        v = int(m.group(2))
+        if 0 <= v <= 100:
+            return v
+
+    anchors = []
+    for kw in ["Сейчас", "текущ", "current", "Now", "Altcoin Season Index", "Индекс сезона альткоинов"]:
+        for a in re.finditer(kw, text, flags=re.I):
+            anchors.append(a.start())
+
+    nums = []
+    for m in re.finditer(r"(?<!\d)(\d{1,3})(?!\d)", text):
+        v = int(m.group(1))
+        if 0 <= v <= 100:
+            nums.append((v, m.start()))
+    if not nums:
+        raise ValueError("Не нашли чисел 0–100 на странице")
+
+    if anchors:
+        def dist(npos: int) -> int:
+            return min(abs(npos - a) for a in anchors)
+
+        filtered = [(v, pos) for (v, pos) in nums if v not in (0, 25, 75, 100)]
+        return min(filtered or nums, key=lambda t: dist(t[1]))[0]
+
+    for v, _ in nums:
+        if 30 <= v <= 90 and v not in (25, 75):
+            return v
+    return nums[0][0]
+
+def _outcome(fn, arg):
+    try:
+        return fn(arg)
+    except ValueError as e:
+        return ("err", str(e))
+
+_WORDS = ["current", "Now", "known", "Сейчас", "текущий", "foo", "bar", "index", "25", "75", "0", "100",
+          "Altcoin Season Index", "Altcoin Season", "x"]
+
+def _random_page(rnd: random.Random) -> str:
+    parts = [rnd.choice(_WORDS + [str(rnd.randint(0, 300))]) for _ in range(rnd.randint(1, 60))]
+    return "<div>" + " ".join(f"<p>{w}</p>" if rnd.random() < .3 else w for w in parts) + "</div>"
+
+def _big_page(rnd: random.Random, tokens: int = 20000) -> str:
+    words = ["current", "now", "x y z"]
+    return "<div>" + " ".join(rnd.choice(words + [str(rnd.randint(0, 999))]) for _ in range(tokens)) + "</div>"
+
+def _small_page() -> str:
+    rows = "".join(f"<tr><td>COIN{i}</td><td>{i * 3 % 97}%</td></tr>" for i in range(50))
+    return (
+        "<html><body><h1>Altcoin Season</h1><p>Current value</p><div class='score'>37</div>"
+        f"<table>{rows}</table><p>Season thresholds: 25 / 75</p></body></html>"
+    )
+
+def check_parity(pages: int, seed: int = 3) -> int:
+    rnd = random.Random(seed)
+    mismatches = 0
+    for _ in range(pages):
+        soup = BeautifulSoup(_random_page(rnd), "html.parser")
+        old = _outcome(_baseline_index, soup.get_text("\n", strip=True))
+        new = _outcome(alt._extract_index_from_soup, soup)
+        if old != new:
+            mismatches += 1
+    return mismatches
+
+def _ms(fn, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - t0) / repeat * 1e3
+
+def bench(name: str, html: str, repeat: int):
+    soup = BeautifulSoup(html, "html.parser")
+    text = soup.get_text("\n", strip=True)
+    t_text = _ms(lambda: soup.get_text("\n", strip=True), repeat)
+    t_old = _ms(lambda: _outcome(_baseline_index, text), repeat)
+    t_new = _ms(lambda: _outcome(alt._extract_index_from_soup, soup), repeat) - t_text
+    t_all = _ms(lambda: _outcome(alt._extract_index_from_soup, soup), repeat)
+    print(f"{name:<14} get_text {t_text:8.2f} ms | по тексту: было {t_old:8.2f} ms, "
+          f"стало ~{max(t_new, 0.0):8.2f} ms | весь вызов {t_all:8.2f} ms")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=3000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("files", nargs="*", help="сохранённые страницы для замера")
+    args = ap.parse_args()
+
+    bad = check_parity(args.pages)
+    print(f"паритет: {args.pages} случайных страниц, расхождений {bad}")
+
+    rnd = random.Random(7)
+    bench("small", _small_page(), args.repeat)
+    bench("20k tokens", _big_page(rnd), args.repeat)
+    for path in args.files:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            bench(os.path.basename(path), f.read(), args.repeat)
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
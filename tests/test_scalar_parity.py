@@ -0,0 +1,52 @@
+# test_scalar_parity.py
+# -*- coding: utf-8 -*-
+"""
+Паритет разбора ячеек Investing с прежней реализацией _to_scalar.
+
+fixtures/scalar_parity.json — замороженный корпус [ячейка, [value, unit]], ответы сняты
+с версии до lru-кэша и упрощённого поиска единицы. Любое расхождение — регрессия.
+
+    python -m unittest discover -s tests
+"""
+
+import json
+import math
+import os
+import sys
+import unittest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import parser_investing_generic as pig  # noqa: E402
+
+with open(os.path.join(HERE, "fixtures", "scalar_parity.json"), encoding="utf-8") as f:
+    CORPUS = [(cell, tuple(expected)) for cell, expected in json.load(f)]
+
+class ScalarParityTest(unittest.TestCase):
+
+    def test_to_scalar_matches_baseline(self):
+        for cell, expected in CORPUS:
+            with self.subTest(cell=cell):
+                self.assertEqual(pig._to_scalar(cell), expected)
+
+    def test_cache_hit_returns_same_result(self):
+        pig._scalar_of.cache_clear()
+        first = [pig._to_scalar(cell) for cell, _ in CORPUS]
+        second = [pig._to_scalar(cell) for cell, _ in CORPUS]
+        self.assertEqual(first, second)
+        self.assertGreater(pig._scalar_of.cache_info().hits, 0)
+
+    def test_parse_cells_matches_scalar(self):
+        cells = [cell for cell, _ in CORPUS]
+        values, units = pig.parse_cells(cells)
+        for i, (cell, (value, unit)) in enumerate(CORPUS):
+            with self.subTest(cell=cell):
+                if value is None:
+                    self.assertTrue(math.isnan(values[i]))
+                else:
+                    self.assertEqual(values[i], value)
+                self.assertEqual(pig.UNIT_NAMES[units[i]], unit)
+
+if __name__ == "__main__":
+    unittest.main()